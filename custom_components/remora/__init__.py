@@ -1,54 +1,612 @@
 """Support for the Remora devices."""
+import asyncio
+from datetime import timedelta
+import ipaddress
 import logging
 import voluptuous as vol
 
 import homeassistant.helpers.config_validation as cv
-from homeassistant.const import CONF_HOST
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_SCAN_INTERVAL,
+    EVENT_HOMEASSISTANT_CLOSE,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
 
-from .const import DOMAIN, SERVICE_RESET
+from .const import (
+    ATTR_ZONES,
+    COMMAND,
+    CONF_ADCO,
+    CONF_AT,
+    CONF_CONNECT_TIMEOUT,
+    CONF_COST,
+    CONF_DAYS,
+    CONF_ENERGY_STATISTICS,
+    CONF_FRESHNESS,
+    CONF_MAX_CONNECTIONS,
+    CONF_MAX_CURRENT,
+    CONF_MODE,
+    CONF_NETWORK,
+    CONF_READ_TIMEOUT,
+    CONF_RESTORE_BELOW,
+    CONF_RESTORE_DELAY,
+    CONF_SCHEDULE,
+    CONF_SHED_ABOVE,
+    CONF_SHED_MODE,
+    CONF_SHEDDING,
+    CONF_TELEINFO_BAUDRATE,
+    CONF_TELEINFO_SOURCE,
+    CONF_WRITE_BUDGET,
+    CONF_ZONE_CURRENT,
+    CONF_ZONES,
+    DATA_COORDINATORS,
+    DATA_COST,
+    DATA_ENERGY,
+    DATA_ENTITIES,
+    DATA_REMORA,
+    DATA_RESUME,
+    DATA_SCHEDULE,
+    DATA_SHEDDING,
+    DATA_SUSPEND,
+    DATA_UNLOAD,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_RESTORE_BELOW,
+    DEFAULT_RESTORE_DELAY,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SHED_ABOVE,
+    DEFAULT_SHED_MODE,
+    DEFAULT_ZONE_CURRENT,
+    DEFAULT_TELEINFO_BAUDRATE,
+    DOMAIN,
+    INIT_RETRY_DELAY,
+    INIT_RETRY_MAX_DELAY,
+    FILPILOTE,
+    HEARTBEAT,
+    INDEX_LABELS,
+    RELAIS,
+    SERVICE_RESET,
+    SERVICE_SET_ZONES,
+    STORAGE_VERSION,
+    TELEINFO,
+)
+from .coordinator import RemoraCoordinator, RemoraTeleInfoCoordinator
+from .cost import RemoraCostEngine
+from .discovery import MAX_SCAN_ADDRESSES, RemoraLocator
+from .energy import RemoraEnergyStatistics
 from .remora import RemoraDevice
+from .schedule import MINUTES_PER_DAY, WEEKDAYS, RemoraSchedule
+from .shedding import RemoraSheddingEngine
+from .teleinfo import TeleInfoStream
 
 _LOGGER = logging.getLogger(__name__)
 
+# Platforms of the devices set up by a config entry
+PLATFORMS = [Platform.CLIMATE, Platform.SENSOR]
+
+
+def fp_mode(value):
+    """Validate and convert a Fil Pilote mode name (ie. Confort, Eco)."""
+    import remora
+
+    try:
+        return remora.FpMode[value]
+    except KeyError as ex:
+        raise vol.Invalid("Invalid Fil Pilote mode: " + str(value)) from ex
+
+
+def network(value):
+    """Validate a network in CIDR notation, small enough to be scanned (ie. a
+    /22 at most)."""
+    try:
+        addresses = ipaddress.ip_network(value, strict=False)
+    except ValueError as ex:
+        raise vol.Invalid("Invalid network: " + str(value)) from ex
+    if addresses.num_addresses > MAX_SCAN_ADDRESSES:
+        raise vol.Invalid(
+            "Network too large, at most "
+            + str(MAX_SCAN_ADDRESSES)
+            + " addresses: "
+            + str(value)
+        )
+    return value
+
+
+def shedding_thresholds(value):
+    """Validate that the zones are restored below the shedding threshold."""
+    if value[CONF_RESTORE_BELOW] >= value[CONF_SHED_ABOVE]:
+        raise vol.Invalid(CONF_RESTORE_BELOW + " must be lower than " + CONF_SHED_ABOVE)
+    return value
+
+
+SHEDDING_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            # Fil Pilote to shed, by priority (the first one is shed first)
+            vol.Required(CONF_ZONES): vol.All(
+                cv.ensure_list, [vol.All(vol.Coerce(int), vol.Range(min=1, max=7))]
+            ),
+            # Thresholds relative to the subscribed current (ISOUSC)
+            vol.Optional(CONF_SHED_ABOVE, default=DEFAULT_SHED_ABOVE): vol.All(
+                vol.Coerce(float), vol.Range(min=0.1, max=1.5)
+            ),
+            vol.Optional(CONF_RESTORE_BELOW, default=DEFAULT_RESTORE_BELOW): vol.All(
+                vol.Coerce(float), vol.Range(min=0.1, max=1.5)
+            ),
+            # Replaces ISOUSC when the meter doesn't send it (standard mode)
+            vol.Optional(CONF_MAX_CURRENT): vol.All(vol.Coerce(float), vol.Range(min=1)),
+            vol.Optional(CONF_ZONE_CURRENT, default=DEFAULT_ZONE_CURRENT): vol.All(
+                vol.Coerce(float), vol.Range(min=0.5)
+            ),
+            vol.Optional(
+                CONF_RESTORE_DELAY, default=DEFAULT_RESTORE_DELAY
+            ): cv.time_period,
+            vol.Optional(CONF_SHED_MODE, default=DEFAULT_SHED_MODE): fp_mode,
+        }
+    ),
+    shedding_thresholds,
+)
+
+# One transition of the weekly schedule of some Fil Pilote
+SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_ZONES): vol.All(
+            cv.ensure_list, [vol.All(vol.Coerce(int), vol.Range(min=1, max=7))]
+        ),
+        vol.Optional(CONF_DAYS, default=WEEKDAYS): vol.All(
+            cv.ensure_list, [vol.In(WEEKDAYS)]
+        ),
+        vol.Required(CONF_AT): cv.time,
+        vol.Required(CONF_MODE): fp_mode,
+    }
+)
+
+DEVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_HOST): cv.string,
+        vol.Optional(
+            CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL
+        ): cv.time_period,
+        # Maximum age of a cached snapshot served to concurrent callers
+        vol.Optional(CONF_FRESHNESS, default={}): vol.Schema(
+            {
+                vol.Optional(FILPILOTE): cv.time_period,
+                vol.Optional(RELAIS): cv.time_period,
+                vol.Optional(TELEINFO): cv.time_period,
+            }
+        ),
+        # Read TeleInfo frames from a serial device or tcp://host:port
+        # instead of polling the Remora device
+        vol.Optional(CONF_TELEINFO_SOURCE): cv.string,
+        vol.Optional(
+            CONF_TELEINFO_BAUDRATE, default=DEFAULT_TELEINFO_BAUDRATE
+        ): cv.positive_int,
+        # Pooled connections to the Remora device and their timeouts
+        vol.Optional(
+            CONF_MAX_CONNECTIONS, default=DEFAULT_MAX_CONNECTIONS
+        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=4)),
+        vol.Optional(
+            CONF_CONNECT_TIMEOUT, default=DEFAULT_CONNECT_TIMEOUT
+        ): cv.time_period,
+        vol.Optional(CONF_READ_TIMEOUT, default={}): vol.Schema(
+            {
+                vol.Optional(COMMAND): cv.time_period,
+                vol.Optional(FILPILOTE): cv.time_period,
+                vol.Optional(HEARTBEAT): cv.time_period,
+                vol.Optional(RELAIS): cv.time_period,
+                vol.Optional(TELEINFO): cv.time_period,
+            }
+        ),
+        # Commands with thermostat decisions sent per minute at most, the
+        # decisions made meanwhile being merged in the next one
+        vol.Optional(CONF_WRITE_BUDGET): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        # Load shedding of Fil Pilote zones on the TeleInfo current
+        vol.Optional(CONF_SHEDDING): SHEDDING_SCHEMA,
+        # Energy indexes imported as hourly statistics
+        vol.Optional(CONF_ENERGY_STATISTICS, default=[]): vol.All(
+            cv.ensure_list, [vol.All(cv.string, vol.Upper, vol.In(INDEX_LABELS))]
+        ),
+        # Prices per kWh of the indexes, per tariff option (OPTARIF)
+        vol.Optional(CONF_COST): vol.Schema(
+            {
+                vol.All(cv.string, vol.Upper): vol.Schema(
+                    {
+                        vol.All(cv.string, vol.Upper): vol.All(
+                            vol.Coerce(float), vol.Range(min=0)
+                        )
+                    }
+                )
+            }
+        ),
+        # Network (ie. 192.168.1.0/24) where the device is looked for when it
+        # stops answering, identified by the meter address of its TeleInfo
+        vol.Optional(CONF_NETWORK): vol.All(cv.string, network),
+        vol.Optional(CONF_ADCO): cv.string,
+        # Weekly schedule of the Fil Pilote
+        vol.Optional(CONF_SCHEDULE, default=[]): vol.All(
+            cv.ensure_list, [SCHEDULE_SCHEMA]
+        ),
+    }
+)
 
+# One or several Remora devices, keyed by host
 CONFIG_SCHEMA = vol.Schema(
-    {DOMAIN: vol.Schema({vol.Required(CONF_HOST): cv.string})}, extra=vol.ALLOW_EXTRA
+    {DOMAIN: vol.All(cv.ensure_list, [DEVICE_SCHEMA], vol.Length(min=1))},
+    extra=vol.ALLOW_EXTRA,
+)
+
+RESET_SCHEMA = vol.Schema({vol.Optional(CONF_HOST): cv.string})
+
+
+SET_ZONES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_HOST): cv.string,
+        vol.Required(ATTR_ZONES): {
+            vol.All(vol.Coerce(int), vol.Range(min=1, max=7)): fp_mode
+        }
+    }
 )
 
-RESET_SCHEMA = vol.Schema({})
+
+def get_remora_data(hass, host=None) -> dict:
+    """Return the {DATA_REMORA, DATA_COORDINATORS[, DATA_SHEDDING, DATA_ENERGY,
+    DATA_SCHEDULE, DATA_COST, DATA_UNLOAD, DATA_SUSPEND, DATA_RESUME,
+    DATA_ENTITIES]} of a Remora device,
+    or of the first one if host is None. Return None for an unknown host."""
+    devices = hass.data[DOMAIN]
+    if host is None:
+        return next(iter(devices.values()), None)
+    return devices.get(host)
 
 
 async def async_setup(hass, config) -> bool:
-    """Set up the Remora devices."""
-    if DOMAIN not in config:
-        _LOGGER.error("Unable to find " + DOMAIN + " in configuration")
-        return False
+    """Set up the Remora devices of the YAML configuration, and the services
+    of all the devices."""
+    hass.data[DOMAIN] = {}
 
-    conf = config[DOMAIN]
+    if DOMAIN in config:
+        # Boards found on the networks of the devices which can move
+        locator = RemoraLocator(Store(hass, STORAGE_VERSION, DOMAIN + ".discovery"))
+        await locator.async_load()
+        # Devices are initialised in the background, so a slow or dead one
+        # never delays Home Assistant startup nor the other devices
+        await asyncio.gather(
+            *(
+                async_setup_device(hass, conf, locator)
+                for conf in config[DOMAIN]
+            )
+        )
 
-    host = conf[CONF_HOST]
-    remora = RemoraDevice(host)
-    hass.data[DOMAIN] = remora
-    # It doesn't really matter why we're not able to get the status,
-    # just that we can't.
-    try:
-        is_ok = await remora.async_check_HeartBeat()
-        if not is_ok:
-            _LOGGER.error("Failure while testing Remora device. HeartBeat != 200 OK")
-            return False    
-        # Load mandatory elments for remora
-        await remora.async_updateAllFilPilote()
-        await remora.async_updateRelais()
-        # Load optional elements for remora (ie TeleInfo)
-        await remora.async_updateTeleInfo()
-        # must add keyword param no_throttle=True
-    except Exception:  # pylint: disable=broad-except
-        _LOGGER.exception("Failure while testing Remora device.")
-        return False
+    def target_devices(service):
+        host = service.data.get(CONF_HOST)
+        if host is None:
+            return [data[DATA_REMORA] for data in hass.data[DOMAIN].values()]
+        if host not in hass.data[DOMAIN]:
+            _LOGGER.error("Unknown Remora device: " + host)
+            return []
+        return [hass.data[DOMAIN][host][DATA_REMORA]]
 
     async def async_reset(service):
-        await hass.data[DOMAIN].async_reset()
+        await asyncio.gather(
+            *(remora.async_reset() for remora in target_devices(service))
+        )
 
     hass.services.async_register(DOMAIN, SERVICE_RESET, async_reset, RESET_SCHEMA)
 
+    async def async_set_zones(service):
+        await asyncio.gather(
+            *(
+                remora.async_set_AllFilPilote(service.data[ATTR_ZONES], override=True)
+                for remora in target_devices(service)
+            )
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_ZONES, async_set_zones, SET_ZONES_SCHEMA
+    )
+
+    return True
+
+
+async def async_setup_entry(hass, entry) -> bool:
+    """Set up a Remora device from a config entry. A device suspended by the
+    unload of the entry (ie. a reload) is resumed with its session and its
+    snapshots, so its entities come back without any request."""
+    host = entry.data[CONF_HOST]
+    scanInterval = timedelta(
+        seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL.seconds)
+    )
+    remoraData = hass.data[DOMAIN].get(host)
+    if remoraData is None:
+        unload, suspend, resume = await async_setup_device(
+            hass,
+            DEVICE_SCHEMA({CONF_HOST: host, CONF_SCAN_INTERVAL: scanInterval}),
+        )
+        remoraData = hass.data[DOMAIN][host]
+        remoraData[DATA_UNLOAD] = unload
+        remoraData[DATA_SUSPEND] = suspend
+        remoraData[DATA_RESUME] = resume
+    else:
+        for coordinator in remoraData[DATA_COORDINATORS].values():
+            coordinator.async_set_scan_interval(scanInterval)
+        remoraData[DATA_RESUME]()
+    remoraData[DATA_ENTITIES] = {}
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
+
+
+async def async_update_options(hass, entry) -> None:
+    """Apply new options without reloading the entry: the coordinators get the
+    new interval, and each platform adds or removes the entities of the zones
+    and labels which changed. Nothing is fetched from the device."""
+    remoraData = hass.data[DOMAIN][entry.data[CONF_HOST]]
+    scanInterval = timedelta(
+        seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL.seconds)
+    )
+    for coordinator in remoraData[DATA_COORDINATORS].values():
+        coordinator.async_set_scan_interval(scanInterval)
+    for async_sync_entities in remoraData[DATA_ENTITIES].values():
+        async_sync_entities(entry.options)
+
+
+async def async_unload_entry(hass, entry) -> bool:
+    """Unload the entities of a config entry and suspend its device: its
+    initialisation, probes, lookups and replays stop, while the device, its
+    session and its snapshots are kept until the entry is removed, to be
+    resumed by the next setup of the entry."""
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    remoraData = hass.data[DOMAIN].get(entry.data[CONF_HOST])
+    if unloaded and remoraData is not None:
+        remoraData[DATA_SUSPEND]()
+    return unloaded
+
+
+async def async_remove_entry(hass, entry) -> None:
+    """Stop and forget the device of a removed config entry."""
+    remoraData = hass.data[DOMAIN].get(entry.data[CONF_HOST])
+    if remoraData is not None and DATA_UNLOAD in remoraData:
+        await remoraData[DATA_UNLOAD]()
+
+
+@callback
+def async_remove_entities(hass, entities) -> None:
+    """Remove entities of a config entry, with their registry entries."""
+    registry = er.async_get(hass)
+    for entity in entities:
+        if entity.registry_entry is not None:
+            registry.async_remove(entity.entity_id)
+        else:
+            hass.async_create_task(entity.async_remove())
+
+
+async def async_setup_device(hass, conf, locator=None):
+    """Set up one Remora device and start its initialisation in the background.
+    Its entities start with the snapshots saved before the last restart, or
+    are unavailable until the initialisation succeeds.
+    Return a coroutine function stopping and removing the device, and the
+    callbacks suspending and resuming its background work."""
+    from .client import create_session
+
+    host = conf[CONF_HOST]
+    # Every request reuses a warm connection of this session
+    session = create_session(conf[CONF_MAX_CONNECTIONS])
+    # Caps the requests running at the same time to this device only, so the
+    # requests to a slow or dead device never hold the ones of the others
+    pollSemaphore = asyncio.Semaphore(conf[CONF_MAX_CONNECTIONS])
+
+    async def async_close_session(event):
+        await session.close()
+
+    unsubClose = hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_CLOSE, async_close_session
+    )
+    # Functions stopping the engines of the device
+    stops = []
+
+    resolver = None
+    if CONF_NETWORK in conf and locator is not None:
+
+        async def resolver():
+            """Return the new address of the board of our meter."""
+            return await locator.async_resolve(
+                conf[CONF_NETWORK], remora.address, meter_address(conf, remora)
+            )
+
+    remora = RemoraDevice(
+        host,
+        conf[CONF_FRESHNESS],
+        session,
+        conf[CONF_CONNECT_TIMEOUT],
+        conf[CONF_READ_TIMEOUT],
+        pollSemaphore,
+        Store(hass, STORAGE_VERSION, DOMAIN + "." + host),
+        resolver,
+        conf.get(CONF_WRITE_BUDGET),
+    )
+    await remora.async_load()
+    # One coordinator per endpoint, shared by all the entities
+    coordinators = {
+        endpoint: RemoraCoordinator(hass, remora, endpoint, conf[CONF_SCAN_INTERVAL])
+        for endpoint in (FILPILOTE, RELAIS)
+    }
+    streaming = CONF_TELEINFO_SOURCE in conf
+    coordinators[TELEINFO] = RemoraTeleInfoCoordinator(
+        hass, remora, conf[CONF_SCAN_INTERVAL], streaming
+    )
+    for coordinator in coordinators.values():
+        coordinator.async_restore()
+    hass.data[DOMAIN][host] = {DATA_REMORA: remora, DATA_COORDINATORS: coordinators}
+
+    if CONF_SHEDDING in conf:
+        shedding = conf[CONF_SHEDDING]
+        engine = RemoraSheddingEngine(
+            remora,
+            coordinators[TELEINFO],
+            shedding[CONF_ZONES],
+            shedding[CONF_SHED_ABOVE],
+            shedding[CONF_RESTORE_BELOW],
+            shedding[CONF_ZONE_CURRENT],
+            shedding[CONF_RESTORE_DELAY],
+            shedding[CONF_SHED_MODE],
+            shedding.get(CONF_MAX_CURRENT),
+            Store(hass, STORAGE_VERSION, DOMAIN + ".shedding." + host),
+        )
+        await engine.async_load()
+        hass.data[DOMAIN][host][DATA_SHEDDING] = engine
+        stops.append(engine.async_start())
+
+    if conf[CONF_ENERGY_STATISTICS]:
+        energy = RemoraEnergyStatistics(
+            hass,
+            remora,
+            coordinators[TELEINFO],
+            conf[CONF_ENERGY_STATISTICS],
+            Store(hass, STORAGE_VERSION, DOMAIN + ".energy." + host),
+        )
+        await energy.async_load()
+        hass.data[DOMAIN][host][DATA_ENERGY] = energy
+        stops.append(energy.async_start())
+
+    if CONF_COST in conf:
+        cost = RemoraCostEngine(
+            hass,
+            coordinators[TELEINFO],
+            conf[CONF_COST],
+            Store(hass, STORAGE_VERSION, DOMAIN + ".cost." + host),
+        )
+        await cost.async_load()
+        hass.data[DOMAIN][host][DATA_COST] = cost
+        stops.append(cost.async_start())
+
+    if conf[CONF_SCHEDULE]:
+        schedule = RemoraSchedule(
+            hass,
+            remora,
+            [
+                (
+                    WEEKDAYS.index(day) * MINUTES_PER_DAY
+                    + entry[CONF_AT].hour * 60
+                    + entry[CONF_AT].minute,
+                    {fpnum: entry[CONF_MODE] for fpnum in entry[CONF_ZONES]},
+                )
+                for entry in conf[CONF_SCHEDULE]
+                for day in entry[CONF_DAYS]
+            ],
+            Store(hass, STORAGE_VERSION, DOMAIN + ".schedule." + host),
+        )
+        hass.data[DOMAIN][host][DATA_SCHEDULE] = schedule
+        await schedule.async_start()
+        stops.append(schedule.async_stop)
+
+    if streaming:
+        # A broken stream makes the TeleInfo unavailable until the next frame
+        stream = TeleInfoStream(
+            conf[CONF_TELEINFO_SOURCE],
+            conf[CONF_TELEINFO_BAUDRATE],
+            remora.push_TeleInfo,
+            coordinators[TELEINFO].async_set_update_error,
+        )
+        stream.start()
+        stops.append(lambda: hass.async_create_task(stream.async_stop()))
+
+    # TeleInfo is optional and is not fetched when streamed
+    endpoints = (FILPILOTE, RELAIS) if streaming else (FILPILOTE, RELAIS, TELEINFO)
+    initTask = None
+
+    @callback
+    def async_resume_device() -> None:
+        """Initialise the device in the background, unless it already was,
+        and resume its probes and replays."""
+        nonlocal initTask
+        if initTask is None:
+            initTask = hass.async_create_background_task(
+                async_initialize_device(
+                    remora, coordinators, endpoints, locator if resolver else None, conf
+                ),
+                DOMAIN + " initialisation of " + host,
+            )
+        remora.resume()
+
+    @callback
+    def async_suspend_device() -> None:
+        """Stop the initialisation, probes, lookups and replays of the device,
+        keeping its session and snapshots."""
+        nonlocal initTask
+        if initTask is not None and not initTask.done():
+            initTask.cancel()
+            initTask = None
+        remora.shutdown()
+
+    async_resume_device()
+
+    @callback
+    def async_stop_device(event):
+        async_suspend_device()
+        for stop in stops:
+            stop()
+
+    unsubStop = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_device)
+
+    async def async_unload_device() -> None:
+        """Stop the device, close its session and forget it."""
+        unsubStop()
+        unsubClose()
+        async_stop_device(None)
+        await session.close()
+        hass.data[DOMAIN].pop(host, None)
+
+    return async_unload_device, async_suspend_device, async_resume_device
+
+
+def meter_address(conf, remora) -> str:
+    """Return the configured meter address of a Remora device, or the one of
+    its last TeleInfo (historic or standard mode), or None."""
+    if CONF_ADCO in conf:
+        return conf[CONF_ADCO]
+    teleInfo = remora.TeleInfo or {}
+    meter = teleInfo.get("ADCO", teleInfo.get("ADSC"))
+    return None if meter is None else str(meter)
+
+
+async def async_initialize_device(
+    remora, coordinators, endpoints, locator=None, conf=None
+) -> None:
+    """Load the endpoints of a Remora device concurrently, retrying with an
+    exponential backoff until the device answers. With a locator, the meter
+    address of the device is then cached."""
+    retryDelay = INIT_RETRY_DELAY
+    while True:
+        # It doesn't really matter why we're not able to get the status,
+        # just that we can't.
+        try:
+            is_ok = await remora.async_check_HeartBeat()
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.debug("HeartBeat of %s failed: %s", remora.host, ex)
+            is_ok = False
+        if is_ok:
+            await asyncio.gather(
+                *(coordinators[endpoint].async_refresh() for endpoint in endpoints)
+            )
+            # Only the endpoints which failed are fetched again
+            endpoints = [
+                endpoint
+                for endpoint in endpoints
+                if not coordinators[endpoint].last_update_success
+            ]
+            if not endpoints:
+                _LOGGER.info("Remora device %s is initialised", remora.host)
+                if locator is not None:
+                    locator.learn(remora.address, meter_address(conf, remora))
+                return
+        _LOGGER.warning(
+            "Failure while initialising Remora device %s, retrying in %s sec",
+            remora.host,
+            retryDelay.total_seconds(),
+        )
+        await asyncio.sleep(retryDelay.total_seconds())
+        retryDelay = min(retryDelay * 2, INIT_RETRY_MAX_DELAY)
@@ -0,0 +1,121 @@
+"""Remora REST client sharing a pooled, keep-alive aiohttp session."""
+import asyncio
+
+import aiohttp
+import remora
+
+from .const import (
+    COMMAND,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    FILPILOTE,
+    HEARTBEAT,
+    RELAIS,
+    TELEINFO,
+)
+
+KEEPALIVE_TIMEOUT = 60
+RESET_TIMEOUT = aiohttp.ClientTimeout(total=3)
+
+
+def create_session(max_connections) -> aiohttp.ClientSession:
+    """Create a session keeping at most max_connections warm connections
+    per Remora device."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit_per_host=max_connections, keepalive_timeout=KEEPALIVE_TIMEOUT
+        )
+    )
+
+
+class RemoraClient(remora.RemoraDevice):
+    """pyremora client issuing its requests through a shared session, with a
+    connect timeout and a read timeout per endpoint."""
+
+    def __init__(self, host, session, connect_timeout=None, read_timeout=None):
+        """Initialize the client."""
+        super().__init__(host)
+        self._session = session
+        if connect_timeout is None:
+            connect_timeout = DEFAULT_CONNECT_TIMEOUT
+        readTimeout = dict(DEFAULT_READ_TIMEOUT)
+        if read_timeout is not None:
+            readTimeout.update(read_timeout)
+        self._timeouts = {
+            endpoint: aiohttp.ClientTimeout(
+                sock_connect=connect_timeout.total_seconds(),
+                sock_read=timeout.total_seconds(),
+            )
+            for endpoint, timeout in readTimeout.items()
+        }
+
+    def _get(self, endpoint, path="", params=None):
+        """Return the request context of a GET on the Remora device."""
+        return self._session.get(
+            self.baseurl + path, params=params, timeout=self._timeouts[endpoint]
+        )
+
+    async def _command(self, params) -> bool:
+        """Send a command and return True if the Remora accepted it."""
+        async with self._get(COMMAND, params=params) as cmd:
+            return (await cmd.json(content_type=None))["response"] == 0
+
+    async def getHeartBeat(self) -> bool:
+        async with self._get(HEARTBEAT, "hb.htm") as hb:
+            await hb.read()
+            return hb.status == 200
+
+    async def getTeleInfo(self) -> dict:
+        async with self._get(TELEINFO, "tinfo") as tinfo:
+            # TELEINFO is not a mandatory, so this method could return None
+            if tinfo.status == 404:
+                await tinfo.read()
+                return None
+            return await tinfo.json(content_type=None)
+
+    async def getAllFilPilote(self) -> dict:
+        async with self._get(FILPILOTE, "fp") as fp:
+            fpjson = await fp.json(content_type=None)
+            return {k: remora.FpMode(v) for k, v in fpjson.items()}
+
+    async def getRelais(self) -> dict:
+        async with self._get(RELAIS, "relais") as relais:
+            rjson = await relais.json(content_type=None)
+            return {
+                "relais": remora.RelaisEtat(rjson["relais"]),
+                "fnct_relais": remora.RelaisMode(rjson["fnct_relais"]),
+            }
+
+    async def setAllFilPilote(self, listMode) -> bool:
+        # Fil Pilote without a valid mode are sent as '-' (unchanged)
+        cmd = ""
+        for m in listMode:
+            if isinstance(m, remora.FpMode):
+                cmd += m.value
+            elif isinstance(m, str) and m.upper() in [
+                mode.value.upper() for mode in remora.FpMode
+            ]:
+                cmd += m.upper()
+            else:
+                cmd += "-"
+        return await self._command({"fp": cmd})
+
+    async def setFilPilote(self, num: int, mode) -> bool:
+        return await self._command({"setfp": str(num) + mode.value})
+
+    async def setRelais(self, state) -> bool:
+        return await self._command({"relais": str(state.value)})
+
+    async def setFnctRelais(self, mode) -> bool:
+        return await self._command({"frelais": str(mode.value)})
+
+    async def reset(self) -> bool:
+        # The Remora reboots without answering
+        try:
+            async with self._session.get(
+                self.baseurl + "reset", timeout=RESET_TIMEOUT
+            ):
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        return True
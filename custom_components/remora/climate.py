@@ -1,4 +1,7 @@
 import logging
+from functools import partial
+from time import monotonic
+
 import voluptuous as vol
 
 import homeassistant.helpers.config_validation as cv
@@ -7,26 +10,70 @@ from homeassistant.components.climate.const import (
     HVACMode,
     ClimateEntityFeature
 )
-from homeassistant.const import CONF_NAME, TEMP_CELSIUS
+from homeassistant.const import (
+    ATTR_TEMPERATURE,
+    CONF_HOST,
+    CONF_NAME,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    TEMP_CELSIUS,
+    Platform,
+)
 from homeassistant.core import callback
-from homeassistant.helpers.event import async_track_state_change
-
-import remora
-
-from .const import CONF_TEMP_SENSOR, DOMAIN, FILPILOTE, FNCT_RELAIS, FP, RELAIS
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_state_change_event,
+)
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import async_remove_entities, get_remora_data
+from .const import (
+    CONF_HYSTERESIS,
+    CONF_IDLE_MODE,
+    CONF_MIN_CYCLE,
+    CONF_TARGET_TEMPERATURE,
+    CONF_TEMP_SENSOR,
+    CONF_ZONES,
+    DATA_COORDINATORS,
+    DATA_ENTITIES,
+    DATA_REMORA,
+    DATA_SHEDDING,
+    DOMAIN,
+    DEFAULT_HYSTERESIS,
+    DEFAULT_IDLE_MODE,
+    DEFAULT_MIN_CYCLE,
+    FILPILOTE,
+    FNCT_RELAIS,
+    FP,
+    FROST_TEMPERATURE,
+    MAX_TEMPERATURE,
+    RELAIS,
+    TEMP_DEBOUNCE,
+    TEMP_MIN_DELTA,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Names of the pyremora modes, which is only imported to send them
+FP_CONFORT = "Confort"
+FP_ARRET = "Arrêt"
+FP_ECO = "Eco"
+FP_HORSGEL = "HorsGel"
+RELAIS_OUVERT = "Ouvert"
+RELAIS_FERME = "Fermé"
+RELAIS_MODES = ["Arrêt", "Automatique", "MarcheForcée"]
+
 REMORA_FP_PRESET_MODES_TO_HVAC_MODE = {
-    remora.FpMode.Arrêt.name: HVACMode.OFF,
-    remora.FpMode.HorsGel.name: HVACMode.COOL,
-    remora.FpMode.Eco.name: HVACMode.HEAT_COOL,
-    remora.FpMode.Confort.name: HVACMode.HEAT,
+    FP_ARRET: HVACMode.OFF,
+    FP_HORSGEL: HVACMode.COOL,
+    FP_ECO: HVACMode.HEAT_COOL,
+    FP_CONFORT: HVACMode.HEAT,
 }
 
 REMORA_RELAIS_ETAT_TO_HVAC_MODE = {
-    remora.RelaisEtat.Ouvert.name: HVACMode.OFF,
-    remora.RelaisEtat.Fermé.name: HVACMode.HEAT,
+    RELAIS_OUVERT: HVACMode.OFF,
+    RELAIS_FERME: HVACMode.HEAT,
 }
 
 FP_CONFIG_SCHEMA = vol.Schema(
@@ -34,12 +81,36 @@ FP_CONFIG_SCHEMA = vol.Schema(
         vol.Required(FP): vol.All(vol.Coerce(int), vol.Range(min=1, max=7)),
         vol.Optional(CONF_NAME): cv.string,
         vol.Optional(CONF_TEMP_SENSOR): cv.string,
+        # Thermostat mode, regulating the zone to this setpoint from the
+        # temp_sensor
+        vol.Optional(CONF_TARGET_TEMPERATURE): vol.All(
+            vol.Coerce(float), vol.Range(min=FROST_TEMPERATURE, max=MAX_TEMPERATURE)
+        ),
+        vol.Optional(CONF_HYSTERESIS, default=DEFAULT_HYSTERESIS): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=3)
+        ),
+        vol.Optional(CONF_MIN_CYCLE, default=DEFAULT_MIN_CYCLE): cv.time_period,
+        vol.Optional(CONF_IDLE_MODE, default=DEFAULT_IDLE_MODE): vol.In(
+            [FP_ECO, FP_HORSGEL]
+        ),
     }
 )
 
+
+def thermostat_sensor(value):
+    """Validate that a thermostat zone has a temp_sensor."""
+    if CONF_TARGET_TEMPERATURE in value and CONF_TEMP_SENSOR not in value:
+        raise vol.Invalid(CONF_TARGET_TEMPERATURE + " needs a " + CONF_TEMP_SENSOR)
+    return value
+
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
-        vol.Optional(FILPILOTE): vol.All(cv.ensure_list, [FP_CONFIG_SCHEMA]),
+        # Remora device driving the heaters, the first one by default
+        vol.Optional(CONF_HOST): cv.string,
+        vol.Optional(FILPILOTE): vol.All(
+            cv.ensure_list, [vol.All(FP_CONFIG_SCHEMA, thermostat_sensor)]
+        ),
         vol.Optional(RELAIS, default=True): cv.boolean,
     }
 )
@@ -49,6 +120,14 @@ CLIMATE_PREFIX = "Remora."
 
 async def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
     """Setup the Remora FilPilote and Relais platform."""
+    remoraData = get_remora_data(hass, config.get(CONF_HOST))
+    if remoraData is None:
+        _LOGGER.error("Remora device %s is not set up", config.get(CONF_HOST))
+        return
+    remoraDevice = remoraData[DATA_REMORA]
+    coordinators = remoraData[DATA_COORDINATORS]
+    # One listener for the temp_sensor of all the Fil Pilote
+    dispatcher = RemoraTemperatureDispatcher(hass)
     entities = []
     if FILPILOTE in config:
         for fp in config[FILPILOTE]:
@@ -62,56 +141,306 @@ async def async_setup_platform(hass, config, async_add_devices, discovery_info=N
             else:
                 temp_sensor_id = None
             entities.append(
-                RemoraFilPiloteClimate(hass.data[DOMAIN], fpnum, fpname, temp_sensor_id)
+                RemoraFilPiloteClimate(
+                    coordinators[FILPILOTE],
+                    remoraDevice,
+                    fpnum,
+                    fpname,
+                    temp_sensor_id,
+                    dispatcher,
+                    fp if CONF_TARGET_TEMPERATURE in fp else None,
+                    shedding=remoraData.get(DATA_SHEDDING),
+                )
             )
     if config[RELAIS]:
-        entities.append(RemoraRelaisClimate(hass.data[DOMAIN]))
+        entities.append(RemoraRelaisClimate(coordinators[RELAIS], remoraDevice))
+
+    async_add_devices(entities)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up the Fil Pilote and Relais of a Remora device config entry.
+    The entities follow the options of the entry without any reload."""
+    remoraData = get_remora_data(hass, entry.data[CONF_HOST])
+    remoraDevice = remoraData[DATA_REMORA]
+    coordinators = remoraData[DATA_COORDINATORS]
+    # fpX or relais -> entity
+    entities = {}
+
+    def async_create_entity(key):
+        uniqueId = "_".join((DOMAIN, remoraDevice.host, key))
+        if key == RELAIS:
+            return RemoraRelaisClimate(coordinators[RELAIS], remoraDevice, uniqueId)
+        fpnum = int(key[len(FP) :])
+        return RemoraFilPiloteClimate(
+            coordinators[FILPILOTE],
+            remoraDevice,
+            fpnum,
+            key,
+            None,
+            None,
+            unique_id=uniqueId,
+        )
+
+    @callback
+    def async_sync_entities(options) -> None:
+        """Add and remove the entities whose zone was added or removed."""
+        keys = [FP + str(fpnum) for fpnum in options.get(CONF_ZONES, [])]
+        if options.get(RELAIS, True):
+            keys.append(RELAIS)
+        async_remove_entities(
+            hass, [entities.pop(key) for key in list(entities) if key not in keys]
+        )
+        added = {key: async_create_entity(key) for key in keys if key not in entities}
+        entities.update(added)
+        async_add_entities(list(added.values()))
+
+    remoraData[DATA_ENTITIES][Platform.CLIMATE] = async_sync_entities
+    async_sync_entities(entry.options)
+
+
+def parse_temperature(state) -> float:
+    """Return the temperature of a sensor state, or None."""
+    if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+        return None
+    try:
+        return float(state.state)
+    except ValueError as ex:
+        _LOGGER.error("Unable to update from sensor: %s", ex)
+        return None
+
+
+class RemoraTemperatureDispatcher:
+    """Tracks the temp_sensor of all the Fil Pilote zones with a single state
+    change listener. Each value is parsed once, and the changes of a zone are
+    coalesced over TEMP_DEBOUNCE before being passed to it.
+    """
+
+    def __init__(self, hass):
+        """Initialize the dispatcher."""
+        self._hass = hass
+        self._zones = {}
+        self._pending = {}
+        self._timers = {}
+        self._unsub = None
 
-    async_add_devices(entities, True)
+    @callback
+    def async_add_zone(self, temp_sensor_id, zone):
+        """Track temp_sensor_id for zone and return a function removing it."""
+        self._zones.setdefault(temp_sensor_id, []).append(zone)
+        self._async_subscribe()
+        zone.async_set_current_temperature(
+            parse_temperature(self._hass.states.get(temp_sensor_id))
+        )
 
+        @callback
+        def remove() -> None:
+            self._zones[temp_sensor_id].remove(zone)
+            if not self._zones[temp_sensor_id]:
+                del self._zones[temp_sensor_id]
+            cancel = self._timers.pop(zone, None)
+            if cancel is not None:
+                cancel()
+            self._pending.pop(zone, None)
+            self._async_subscribe()
 
-class RemoraFilPiloteClimate(ClimateEntity):
-    def __init__(self, remoraDevice, fpnum, fpname, temp_sensor_id):
+        return remove
+
+    @callback
+    def _async_subscribe(self) -> None:
+        """Listen to the state changes of the tracked sensors."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if self._zones:
+            self._unsub = async_track_state_change_event(
+                self._hass, list(self._zones), self._async_sensor_changed
+            )
+
+    @callback
+    def _async_sensor_changed(self, event) -> None:
+        """Queue the new temperature for the zones of the sensor."""
+        temperature = parse_temperature(event.data.get("new_state"))
+        if temperature is None:
+            return
+        for zone in self._zones.get(event.data["entity_id"], []):
+            self._pending[zone] = temperature
+            if zone not in self._timers:
+                self._timers[zone] = async_call_later(
+                    self._hass, TEMP_DEBOUNCE, partial(self._async_flush, zone)
+                )
+
+    @callback
+    def _async_flush(self, zone, now) -> None:
+        """Pass the last queued temperature to a zone."""
+        self._timers.pop(zone, None)
+        temperature = self._pending.pop(zone, None)
+        if temperature is not None:
+            zone.async_set_current_temperature(temperature)
+
+
+class RemoraFilPiloteClimate(CoordinatorEntity, ClimateEntity, RestoreEntity):
+    def __init__(
+        self,
+        coordinator,
+        remoraDevice,
+        fpnum,
+        fpname,
+        temp_sensor_id,
+        dispatcher,
+        thermostat=None,
+        unique_id=None,
+        shedding=None,
+    ):
+        """Initialize the zone. With a thermostat configuration, the zone can
+        be regulated to a setpoint (hvac_mode auto), except while it is shed
+        by the shedding engine."""
+        super().__init__(coordinator)
+        self._attr_unique_id = unique_id
+        self._shedding = shedding
         self._remora = remoraDevice
         self._fpnum = fpnum
         self._fp = FP + str(fpnum)
         self._name = fpname
-        self._preset_mode = self._remora.FilPiloteDic[self._fp].name
+        self._preset_mode = None
         self._temp_sensor_id = temp_sensor_id
+        self._dispatcher = dispatcher
         self._cur_temp = None
+        self._thermostat = thermostat is not None
+        self._regulating = self._thermostat
+        if self._thermostat:
+            self._target_temp = thermostat[CONF_TARGET_TEMPERATURE]
+            self._hysteresis = thermostat[CONF_HYSTERESIS]
+            self._min_cycle = thermostat[CONF_MIN_CYCLE].total_seconds()
+            self._idle_mode = thermostat[CONF_IDLE_MODE]
+        else:
+            self._target_temp = None
+        self._lastSwitch = None
+        self._requested = None
+        self._cycleTimer = None
+        self._update_from_snapshot()
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added."""
         await super().async_added_to_hass()
+        if self._thermostat:
+            # The setpoint and the regulation survive the restarts
+            lastState = await self.async_get_last_state()
+            if lastState is not None:
+                if lastState.attributes.get(ATTR_TEMPERATURE) is not None:
+                    self._target_temp = float(lastState.attributes[ATTR_TEMPERATURE])
+                # Not when the zone was unavailable or unknown
+                if lastState.state in list(HVACMode):
+                    self._regulating = lastState.state == HVACMode.AUTO
+            self.async_on_remove(self._async_cancel_cycle)
+            self.async_on_remove(
+                self._remora.add_override_listener(self._async_zones_overridden)
+            )
         if self._temp_sensor_id is not None:
-            # Set the current value of the temp_sensor
-            current_temp_state = self.hass.states.get(self._temp_sensor_id)
-            if current_temp_state is not None:
-                self._async_update_temp(current_temp_state)
-            # Record a State Changed Listener
-            async_track_state_change(
-                self.hass, self._temp_sensor_id, self._async_sensor_changed
+            self.async_on_remove(
+                self._dispatcher.async_add_zone(self._temp_sensor_id, self)
             )
 
-    async def _async_sensor_changed(self, entity_id, old_state, new_state) -> None:
-        if new_state is None:
+    @callback
+    def async_set_current_temperature(self, temperature) -> None:
+        """Update the temperature from the sensor, and write the state only if
+        the displayed temperature changed."""
+        if temperature is None:
             return
-        self._async_update_temp(new_state)
-        # No modification on the heater
-        await self.async_update_ha_state()
+        temperature = round(temperature, 1)
+        if (
+            self._cur_temp is not None
+            and abs(temperature - self._cur_temp) < TEMP_MIN_DELTA
+        ):
+            return
+        self._cur_temp = temperature
+        if self.hass is not None:
+            self.async_write_ha_state()
+            self._async_regulate()
 
     @callback
-    def _async_update_temp(self, state) -> None:
-        """Update thermostat with latest state from sensor."""
+    def _async_regulate(self) -> None:
+        """Switch the zone to Confort below the setpoint, to the idle mode
+        above it, with at most one switch per minimum cycle. The writes of all
+        the zones are merged and paced by the write budget of the device.
+        A zone in another mode (ie. Arrêt) is taken over at once."""
+        if not self._regulating or self._cur_temp is None:
+            return
+        # A shed zone is restored by the shedding engine
+        if self._shedding is not None and self._fpnum in self._shedding.shed_zones:
+            return
+        current = self._requested or self._preset_mode
+        if self._target_temp <= FROST_TEMPERATURE:
+            fpmode = FP_HORSGEL
+        elif self._cur_temp <= self._target_temp - self._hysteresis:
+            fpmode = FP_CONFORT
+        elif self._cur_temp >= self._target_temp + self._hysteresis:
+            fpmode = self._idle_mode
+        elif current in (FP_CONFORT, self._idle_mode):
+            # Within the hysteresis
+            return
+        elif self._cur_temp < self._target_temp:
+            fpmode = FP_CONFORT
+        else:
+            fpmode = self._idle_mode
+        if fpmode == current or self._cycleTimer is not None:
+            return
+        if self._lastSwitch is not None:
+            elapsed = monotonic() - self._lastSwitch
+            if elapsed < self._min_cycle:
+                self._cycleTimer = async_call_later(
+                    self.hass, self._min_cycle - elapsed, self._async_cycle_ended
+                )
+                return
+        self._lastSwitch = monotonic()
+        self._requested = fpmode
+        self.hass.async_create_task(self._async_write_mode(fpmode))
+
+    async def _async_write_mode(self, fpmode) -> None:
+        """Send the mode decided by the thermostat."""
+        import remora
+
         try:
-            self._cur_temp = float(state.state)
-        except ValueError as ex:
-            _LOGGER.error("Unable to update from sensor: %s", ex)
+            await self._remora.async_set_FilPilote(
+                self._fpnum, remora.FpMode[fpmode], budgeted=True
+            )
+        except Exception as ex:  # pylint: disable=broad-except
+            # Queued by the device, and replayed once it answers again
+            _LOGGER.warning("Unable to regulate %s: %s", self._fp, ex)
+        finally:
+            self._requested = None
+
+    @callback
+    def _async_cycle_ended(self, now) -> None:
+        """Regulate again once the minimum cycle is over."""
+        self._cycleTimer = None
+        self._lastSwitch = None
+        self._async_regulate()
+
+    @callback
+    def _async_zones_overridden(self, fpModes) -> None:
+        """Stop the thermostat mode when a schedule or a service sets the zone,
+        as a mode set by hand does."""
+        if self._fpnum in fpModes:
+            self._async_stop_regulating()
+
+    @callback
+    def _async_stop_regulating(self) -> None:
+        if self._regulating:
+            self._regulating = False
+            self._async_cancel_cycle()
+            self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_cycle(self) -> None:
+        if self._cycleTimer is not None:
+            self._cycleTimer()
+            self._cycleTimer = None
 
     @property
-    def should_poll(self) -> bool:
-        """Return the polling state."""
-        return True
+    def available(self) -> bool:
+        """Return True if the Remora device is reachable."""
+        return self.coordinator.available
 
     @property
     def name(self) -> str:
@@ -123,15 +452,40 @@ class RemoraFilPiloteClimate(ClimateEntity):
         """Return the sensor temperature."""
         return self._cur_temp
 
+    @property
+    def target_temperature(self) -> float:
+        """Return the setpoint of the thermostat mode."""
+        return self._target_temp
+
+    @property
+    def target_temperature_step(self) -> float:
+        """Return the step of the setpoint."""
+        return 0.5
+
+    @property
+    def min_temp(self) -> float:
+        """Return the lowest setpoint, HorsGel."""
+        return FROST_TEMPERATURE
+
+    @property
+    def max_temp(self) -> float:
+        """Return the highest setpoint."""
+        return MAX_TEMPERATURE
+
     @property
     def hvac_mode(self) -> str:
         """Return current operation ie. heat, cool, idle."""
-        return REMORA_FP_PRESET_MODES_TO_HVAC_MODE[self._preset_mode]
+        if self._regulating:
+            return HVACMode.AUTO
+        return REMORA_FP_PRESET_MODES_TO_HVAC_MODE.get(self._preset_mode)
 
     @property
     def hvac_modes(self) -> list:
         """Return current operation ie. heat, cool, idle."""
-        return list(REMORA_FP_PRESET_MODES_TO_HVAC_MODE.values())
+        hvacModes = list(REMORA_FP_PRESET_MODES_TO_HVAC_MODE.values())
+        if self._thermostat:
+            hvacModes.append(HVACMode.AUTO)
+        return hvacModes
 
     @property
     def preset_mode(self) -> str:
@@ -151,33 +505,68 @@ class RemoraFilPiloteClimate(ClimateEntity):
     @property
     def supported_features(self) -> int:
         """Return the list of supported features."""
+        if self._thermostat:
+            return (
+                ClimateEntityFeature.PRESET_MODE
+                | ClimateEntityFeature.TARGET_TEMPERATURE
+            )
         return ClimateEntityFeature.PRESET_MODE
 
+    async def async_set_temperature(self, **kwargs) -> None:
+        """Set the setpoint of the thermostat mode."""
+        temperature = kwargs.get(ATTR_TEMPERATURE)
+        if temperature is None or not self._thermostat:
+            return
+        self._target_temp = temperature
+        self.async_write_ha_state()
+        self._async_regulate()
+
     async def async_set_hvac_mode(self, hvac_mode) -> None:
         """Set new target hvac mode."""
+        if hvac_mode == HVACMode.AUTO:
+            if not self._thermostat:
+                raise ValueError(self._fp + " has no thermostat mode")
+            self._regulating = True
+            self.async_write_ha_state()
+            self._async_regulate()
+            return
         fpmode = self.preset_modes[self.hvac_modes.index(hvac_mode)]
         await self.async_set_preset_mode(fpmode)
 
     async def async_set_preset_mode(self, preset_mode) -> None:
-        await self._remora.async_set_FilPilote(self._fpnum, remora.FpMode[preset_mode])
-        self._preset_mode = preset_mode
-        self.async_schedule_update_ha_state()
-
-    async def async_update(self) -> None:
-        await self._remora.async_updateAllFilPilote()
-        self._preset_mode = self._remora.FilPiloteDic[self._fp].name
+        # A mode set by hand stops the thermostat mode
+        self._async_stop_regulating()
+        import remora
 
+        # The new mode is pushed back by the coordinator once written
+        await self._remora.async_set_FilPilote(self._fpnum, remora.FpMode[preset_mode])
 
-class RemoraRelaisClimate(ClimateEntity):
-    def __init__(self, remoraDevice):
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle a new FilPilote snapshot pushed by the coordinator."""
+        self._update_from_snapshot()
+        super()._handle_coordinator_update()
+
+    def _update_from_snapshot(self) -> None:
+        """Read our preset mode from the latest FilPilote snapshot."""
+        fpDic = self.coordinator.data
+        if fpDic is not None and self._fp in fpDic:
+            self._preset_mode = fpDic[self._fp].name
+
+
+class RemoraRelaisClimate(CoordinatorEntity, ClimateEntity):
+    def __init__(self, coordinator, remoraDevice, unique_id=None):
+        super().__init__(coordinator)
+        self._attr_unique_id = unique_id
         self._remora = remoraDevice
-        self._relais_etat = self._remora.RelaisDic[RELAIS].name
-        self._relais_mode = self._remora.RelaisDic[FNCT_RELAIS].name
+        self._relais_etat = None
+        self._relais_mode = None
+        self._update_from_snapshot()
 
     @property
-    def should_poll(self) -> bool:
-        """Return the polling state."""
-        return True
+    def available(self) -> bool:
+        """Return True if the Remora device is reachable."""
+        return self.coordinator.available
 
     @property
     def name(self) -> str:
@@ -187,7 +576,7 @@ class RemoraRelaisClimate(ClimateEntity):
     @property
     def hvac_mode(self) -> str:
         """Return current operation ie. heat, of."""
-        return REMORA_RELAIS_ETAT_TO_HVAC_MODE[self._relais_etat]
+        return REMORA_RELAIS_ETAT_TO_HVAC_MODE.get(self._relais_etat)
 
     @property
     def hvac_modes(self) -> list:
@@ -202,13 +591,7 @@ class RemoraRelaisClimate(ClimateEntity):
     @property
     def preset_modes(self) -> list:
         """Return the list of available operation modes."""
-        return list(
-            [
-                remora.RelaisMode.Arrêt.name,
-                remora.RelaisMode.Automatique.name,
-                remora.RelaisMode.MarcheForcée.name,
-            ]
-        )
+        return list(RELAIS_MODES)
 
     @property
     def temperature_unit(self) -> str:
@@ -221,21 +604,29 @@ class RemoraRelaisClimate(ClimateEntity):
         return ClimateEntityFeature.PRESET_MODE
 
     async def async_set_hvac_mode(self, hvac_mode) -> None:
+        import remora
+
         eMode = [
             key
             for (key, value) in REMORA_RELAIS_ETAT_TO_HVAC_MODE.items()
             if value == hvac_mode
         ][0]
         await self._remora.async_set_EtatRelais(remora.RelaisEtat[eMode])
-        self._relais_etat = eMode
-        self.async_schedule_update_ha_state()
 
     async def async_set_preset_mode(self, preset_mode) -> None:
+        import remora
+
         await self._remora.async_set_ModeRelais(remora.RelaisMode[preset_mode])
-        self._preset_mode = preset_mode
-        self.async_schedule_update_ha_state()
 
-    async def async_update(self) -> None:
-        await self._remora.async_updateRelais()
-        self._relais_etat = self._remora.RelaisDic[RELAIS].name
-        self._relais_mode = self._remora.RelaisDic[FNCT_RELAIS].name
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle a new Relais snapshot pushed by the coordinator."""
+        self._update_from_snapshot()
+        super()._handle_coordinator_update()
+
+    def _update_from_snapshot(self) -> None:
+        """Read our state and mode from the latest Relais snapshot."""
+        relaisDic = self.coordinator.data
+        if relaisDic is not None:
+            self._relais_etat = relaisDic[RELAIS].name
+            self._relais_mode = relaisDic[FNCT_RELAIS].name
@@ -0,0 +1,116 @@
+"""Config flow for the Remora devices."""
+import voluptuous as vol
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_HOST, CONF_RESOURCES, CONF_SCAN_INTERVAL
+from homeassistant.core import callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    CONF_DISCOVERY,
+    CONF_ZONES,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    FP,
+    RELAIS,
+)
+from .discovery import NB_FILPILOTE, async_probe
+
+
+class RemoraConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Adds a Remora device, checked by its heartbeat and Fil Pilote list."""
+
+    VERSION = 1
+
+    async def async_step_user(self, user_input=None):
+        """Ask the host of the device."""
+        errors = {}
+        if user_input is not None:
+            host = user_input[CONF_HOST]
+            await self.async_set_unique_id(host)
+            self._abort_if_unique_id_configured()
+            # Devices of the YAML configuration are already set up
+            if host in self.hass.data.get(DOMAIN, {}):
+                return self.async_abort(reason="already_configured")
+            meter = await async_probe(async_get_clientsession(self.hass), host)
+            if meter is None:
+                errors["base"] = "cannot_connect"
+            else:
+                return self.async_create_entry(
+                    title="Remora " + host,
+                    data={CONF_HOST: host},
+                    options={
+                        CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL.seconds,
+                        CONF_ZONES: [],
+                        RELAIS: True,
+                        CONF_RESOURCES: [],
+                        CONF_DISCOVERY: bool(meter),
+                    },
+                )
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema({vol.Required(CONF_HOST): cv.string}),
+            errors=errors,
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow of the entry."""
+        return RemoraOptionsFlow(config_entry)
+
+
+class RemoraOptionsFlow(config_entries.OptionsFlow):
+    """Changes the zones, TeleInfo labels and scan interval of a device.
+    The new options are applied without reloading the entry."""
+
+    def __init__(self, config_entry):
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            user_input[CONF_ZONES] = sorted(
+                int(fpnum) for fpnum in user_input[CONF_ZONES]
+            )
+            return self.async_create_entry(title="", data=user_input)
+        # Only needed to list the labels
+        from .sensor import DESCRIPTION, SENSOR_TYPES
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SCAN_INTERVAL,
+                        default=options.get(
+                            CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL.seconds
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                    vol.Required(
+                        CONF_ZONES,
+                        default=[str(fpnum) for fpnum in options.get(CONF_ZONES, [])],
+                    ): cv.multi_select(
+                        {
+                            str(fpnum): FP + str(fpnum)
+                            for fpnum in range(1, NB_FILPILOTE + 1)
+                        }
+                    ),
+                    vol.Required(RELAIS, default=options.get(RELAIS, True)): bool,
+                    vol.Required(
+                        CONF_RESOURCES, default=options.get(CONF_RESOURCES, [])
+                    ): cv.multi_select(
+                        {
+                            label: label + " (" + sensor_type[DESCRIPTION] + ")"
+                            for label, sensor_type in SENSOR_TYPES.items()
+                        }
+                    ),
+                    vol.Required(
+                        CONF_DISCOVERY, default=options.get(CONF_DISCOVERY, False)
+                    ): bool,
+                }
+            ),
+        )
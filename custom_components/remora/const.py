@@ -1,8 +1,130 @@
 """Constants used by the Remora component."""
+from datetime import timedelta
+
 DOMAIN = "remora"
 FILPILOTE = "filpilote"
 FP = "fp"
 RELAIS = "relais"
 FNCT_RELAIS = "fnct_relais"
+TELEINFO = "teleinfo"
+HEARTBEAT = "heartbeat"
+COMMAND = "command"
 CONF_TEMP_SENSOR = "temp_sensor"
+CONF_FRESHNESS = "freshness"
+CONF_TELEINFO_SOURCE = "teleinfo_source"
+CONF_TELEINFO_BAUDRATE = "teleinfo_baudrate"
+CONF_MAX_CONNECTIONS = "max_connections"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_SHEDDING = "shedding"
+CONF_ZONES = "zones"
+CONF_SHED_ABOVE = "shed_above"
+CONF_RESTORE_BELOW = "restore_below"
+CONF_ZONE_CURRENT = "zone_current"
+CONF_MAX_CURRENT = "max_current"
+CONF_RESTORE_DELAY = "restore_delay"
+CONF_SHED_MODE = "shed_mode"
+CONF_ENERGY_STATISTICS = "energy_statistics"
+CONF_SCHEDULE = "schedule"
+CONF_COST = "cost"
+CONF_DISCOVERY = "discovery"
+CONF_WRITE_BUDGET = "write_budget"
+CONF_TARGET_TEMPERATURE = "target_temperature"
+CONF_HYSTERESIS = "hysteresis"
+CONF_MIN_CYCLE = "min_cycle"
+CONF_IDLE_MODE = "idle_mode"
+CONF_NETWORK = "network"
+CONF_ADCO = "adco"
+CONF_DAYS = "days"
+CONF_AT = "at"
+CONF_MODE = "mode"
 SERVICE_RESET = "reset"
+SERVICE_SET_ZONES = "set_zones"
+ATTR_ZONES = "zones"
+
+DATA_REMORA = "remora"
+DATA_COORDINATORS = "coordinators"
+DATA_SHEDDING = "shedding"
+DATA_ENERGY = "energy"
+DATA_SCHEDULE = "schedule"
+DATA_COST = "cost"
+# Set up by a config entry: its unload, suspend and resume functions and the
+# functions syncing the entities of each platform with the options of the entry
+DATA_UNLOAD = "unload"
+DATA_SUSPEND = "suspend"
+DATA_RESUME = "resume"
+DATA_ENTITIES = "entities"
+STORAGE_VERSION = 1
+
+DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
+# The ESP firmware of the Remora handles very few simultaneous connections
+DEFAULT_MAX_CONNECTIONS = 2
+DEFAULT_CONNECT_TIMEOUT = timedelta(seconds=3)
+DEFAULT_READ_TIMEOUT = {
+    HEARTBEAT: timedelta(seconds=3),
+    TELEINFO: timedelta(seconds=5),
+    FILPILOTE: timedelta(seconds=5),
+    RELAIS: timedelta(seconds=5),
+    COMMAND: timedelta(seconds=10),
+}
+# Temperature sensor changes of a zone are coalesced over TEMP_DEBOUNCE and
+# written only when the displayed temperature changes by TEMP_MIN_DELTA
+TEMP_DEBOUNCE = timedelta(seconds=5)
+TEMP_MIN_DELTA = 0.1
+# Thermostat mode of a Fil Pilote zone: Confort below the setpoint minus the
+# hysteresis, the idle mode above the setpoint plus the hysteresis, with at
+# most one switch per DEFAULT_MIN_CYCLE. HorsGel at or below FROST_TEMPERATURE
+DEFAULT_HYSTERESIS = 0.3
+DEFAULT_MIN_CYCLE = timedelta(minutes=5)
+DEFAULT_IDLE_MODE = "Eco"
+FROST_TEMPERATURE = 7.0
+MAX_TEMPERATURE = 30.0
+# Load shedding thresholds, relative to the subscribed current (ISOUSC)
+DEFAULT_SHED_ABOVE = 0.95
+DEFAULT_RESTORE_BELOW = 0.8
+# Current drawn by a heater, used to estimate how many zones to shed
+DEFAULT_ZONE_CURRENT = 7.0
+DEFAULT_RESTORE_DELAY = timedelta(seconds=60)
+DEFAULT_SHED_MODE = "Arrêt"
+# Energy indexes (in Wh) which can be imported as hourly statistics
+INDEX_LABELS = (
+    "BASE",
+    "HCHC",
+    "HCHP",
+    "EJPHN",
+    "EJPHPM",
+    "BBRHCJB",
+    "BBRHPJB",
+    "BBRHCJW",
+    "BBRHPJW",
+    "BBRHCJR",
+    "BBRHPJR",
+)
+# Windows of the rolling statistics sensors
+STATISTICS_WINDOWS = {
+    "1min": timedelta(minutes=1),
+    "15min": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+}
+# Backoff of the background initialisation of an unreachable Remora device
+INIT_RETRY_DELAY = timedelta(seconds=5)
+INIT_RETRY_MAX_DELAY = timedelta(minutes=5)
+# Historic TIC mode, the standard (Linky) mode runs at 9600 bauds
+DEFAULT_TELEINFO_BAUDRATE = 1200
+
+# TeleInfo refresh policies: labels are published when their value changes,
+# fast ones on any snapshot, slow ones at most once per REFRESH_SLOW_INTERVAL,
+# on_change ones at the scan interval and static ones only once
+REFRESH_FAST = "fast"
+REFRESH_SLOW = "slow"
+REFRESH_STATIC = "static"
+REFRESH_ON_CHANGE = "on_change"
+REFRESH_FAST_INTERVAL = timedelta(seconds=2)
+REFRESH_SLOW_INTERVAL = timedelta(minutes=5)
+
+# TeleInfo labels firing an EVENT_TELEINFO_TRANSITION when their value changes
+TELEINFO_TRANSITION_LABELS = ("PTEC", "DEMAIN", "PEJP")
+EVENT_TELEINFO_TRANSITION = "remora_teleinfo_transition"
+ATTR_LABEL = "label"
+ATTR_OLD_VALUE = "old_value"
+ATTR_NEW_VALUE = "new_value"
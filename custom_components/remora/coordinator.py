@@ -0,0 +1,244 @@
+"""Update coordinators for the Remora devices."""
+import logging
+from time import monotonic
+
+from homeassistant.const import CONF_HOST
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import (
+    ATTR_LABEL,
+    ATTR_NEW_VALUE,
+    ATTR_OLD_VALUE,
+    DOMAIN,
+    EVENT_TELEINFO_TRANSITION,
+    REFRESH_FAST,
+    REFRESH_FAST_INTERVAL,
+    REFRESH_SLOW,
+    REFRESH_SLOW_INTERVAL,
+    REFRESH_STATIC,
+    TELEINFO,
+    TELEINFO_TRANSITION_LABELS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RemoraCoordinator(DataUpdateCoordinator):
+    """Owns the fetch loop of one Remora endpoint (teleinfo, filpilote or relais).
+    Each snapshot is pushed to all subscribed entities in one pass, including
+    the ones written through by the device, which postpones the next fetch.
+    """
+
+    def __init__(self, hass, remoraDevice, endpoint, update_interval):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN + "." + remoraDevice.host + "." + endpoint,
+            update_interval=update_interval,
+        )
+        self._remora = remoraDevice
+        self.endpoint = endpoint
+        # Entities are unavailable until the first snapshot is loaded
+        self.last_update_success = False
+        remoraDevice.add_listener(endpoint, self._async_snapshot_changed)
+
+    @callback
+    def async_restore(self) -> None:
+        """Start from the snapshot restored by the device, if any, until the
+        first fetch replaces it."""
+        snapshot = self._remora.snapshot(self.endpoint)
+        if snapshot is not None:
+            self.data = snapshot
+            self.last_update_success = True
+
+    @property
+    def available(self) -> bool:
+        """Return True if the last fetch succeeded and the device is reachable."""
+        return self.last_update_success and self._remora.available
+
+    @callback
+    def async_set_scan_interval(self, scan_interval) -> None:
+        """Fetch at a new interval, counted from now, without fetching."""
+        if scan_interval == self.update_interval:
+            return
+        self.update_interval = scan_interval
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def _async_snapshot_changed(self, invalidated) -> None:
+        """Push a written through snapshot, or fetch an invalidated one."""
+        if invalidated:
+            self.hass.async_create_task(self.async_refresh())
+        else:
+            self.async_set_updated_data(self._remora.snapshot(self.endpoint))
+
+    async def _async_update_data(self) -> dict:
+        """Fetch the latest snapshot of the endpoint."""
+        try:
+            return await self._remora.async_update(self.endpoint)
+        except Exception as ex:  # pylint: disable=broad-except
+            raise UpdateFailed(
+                "Unable to fetch " + self.endpoint + " from Remora: " + str(ex)
+            ) from ex
+
+
+class RemoraTeleInfoCoordinator(RemoraCoordinator):
+    """Coordinator of the TeleInfo endpoint.
+    Listeners subscribe with a (label, refresh policy, deadband) context: each
+    snapshot is diffed against the published values and a label is published
+    only when it changed by at least its deadband, at the cadence of its
+    policy. The TeleInfo is fetched only as often as the fastest active label
+    needs, and transitions of TELEINFO_TRANSITION_LABELS fire an event.
+    When streaming, frames are pushed by the device and nothing is fetched,
+    the TeleInfo failing only when the stream does (async_set_update_error).
+    """
+
+    def __init__(self, hass, remoraDevice, update_interval, streaming=False):
+        """Initialize the coordinator."""
+        super().__init__(hass, remoraDevice, TELEINFO, update_interval)
+        self.streaming = streaming
+        # Interval used by on_change labels and listeners without a label
+        self._scan_interval = update_interval
+        # label -> (published value, publication time)
+        self._published = {}
+        self._lastSuccess = False
+        self._previous = None
+
+    @property
+    def available(self) -> bool:
+        """Return True if the last snapshot is valid. A streamed TeleInfo does
+        not depend on the Remora device being reachable."""
+        if self.streaming:
+            return self.last_update_success
+        return super().available
+
+    @callback
+    def _async_snapshot_changed(self, invalidated) -> None:
+        """Push the latest snapshot. Streamed frames are never fetched, nor
+        invalidated by the errors of the device."""
+        if invalidated and self.streaming:
+            return
+        super()._async_snapshot_changed(invalidated)
+
+    async def _async_update_data(self) -> dict:
+        """Fetch the latest TeleInfo, or return the last streamed frame."""
+        if self.streaming:
+            return self._remora.TeleInfo
+        return await super()._async_update_data()
+
+    @callback
+    def async_set_scan_interval(self, scan_interval) -> None:
+        """Change the interval of the on_change labels."""
+        self._scan_interval = scan_interval
+        self._async_update_interval()
+
+    def _policy_interval(self, policy):
+        """Return the fetch interval needed by a refresh policy."""
+        if policy == REFRESH_FAST:
+            return REFRESH_FAST_INTERVAL
+        if policy == REFRESH_SLOW:
+            return max(REFRESH_SLOW_INTERVAL, self._scan_interval)
+        if policy == REFRESH_STATIC:
+            return None
+        return self._scan_interval
+
+    @callback
+    def _async_update_interval(self) -> None:
+        """Fetch as often as the fastest active label needs."""
+        intervals = [
+            self._policy_interval(context[1] if context is not None else None)
+            for _, context in self._listeners.values()
+        ]
+        intervals = [interval for interval in intervals if interval is not None]
+        update_interval = min(intervals) if intervals and not self.streaming else None
+        if update_interval == self.update_interval:
+            return
+        self.update_interval = update_interval
+        if update_interval is None:
+            self._async_unsub_refresh()
+        elif self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_add_listener(self, update_callback, context=None):
+        """Listen for a label (context is (label, policy, deadband)), or for
+        all updates at the cadence of a policy (label None) or of the scan
+        interval (no context)."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        self._async_update_interval()
+
+        @callback
+        def remove() -> None:
+            remove_listener()
+            self._async_update_interval()
+
+        return remove
+
+    def _is_due(self, label, policy, deadband, now) -> bool:
+        """Return True if a label must be published to its listeners."""
+        if label not in self._published:
+            return True
+        value = None if self.data is None else self.data.get(label)
+        published, publishedAt = self._published[label]
+        if policy == REFRESH_STATIC:
+            return published is None and value is not None
+        if value == published:
+            return False
+        if (
+            deadband
+            and isinstance(value, (int, float))
+            and isinstance(published, (int, float))
+            and abs(value - published) < deadband
+        ):
+            return False
+        if policy == REFRESH_SLOW:
+            return now - publishedAt >= REFRESH_SLOW_INTERVAL.total_seconds()
+        return True
+
+    @callback
+    def _async_fire_transitions(self) -> None:
+        """Fire an event for each transition of TELEINFO_TRANSITION_LABELS."""
+        previous, self._previous = self._previous, self.data
+        if previous is None or self.data is None:
+            return
+        for label in TELEINFO_TRANSITION_LABELS:
+            old_value = previous.get(label)
+            new_value = self.data.get(label)
+            if old_value != new_value:
+                self.hass.bus.async_fire(
+                    EVENT_TELEINFO_TRANSITION,
+                    {
+                        CONF_HOST: self._remora.host,
+                        ATTR_LABEL: label,
+                        ATTR_OLD_VALUE: old_value,
+                        ATTR_NEW_VALUE: new_value,
+                    },
+                )
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Publish the labels which changed and are due according to their policy."""
+        now = monotonic()
+        self._async_fire_transitions()
+        # Availability changes must reach every listener
+        availabilityChanged = self.last_update_success != self._lastSuccess
+        self._lastSuccess = self.last_update_success
+        due = {}
+        for update_callback, context in list(self._listeners.values()):
+            # Listeners without a label get every snapshot
+            if context is None or context[0] is None:
+                update_callback()
+                continue
+            label, policy, deadband = context
+            if label not in due:
+                due[label] = availabilityChanged or self._is_due(
+                    label, policy, deadband, now
+                )
+                if due[label]:
+                    value = None if self.data is None else self.data.get(label)
+                    self._published[label] = (value, now)
+            if due[label]:
+                update_callback()
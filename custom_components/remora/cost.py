@@ -0,0 +1,202 @@
+"""Running cost of the energy consumed, from the TeleInfo indexes."""
+import logging
+import re
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Delay of the save of the counters (flushed anyway at stop)
+SAVE_DELAY = 60
+# Index of the consumption of each tariff period (PTEC) of the historic mode
+PTEC_INDEX = {
+    "TH..": "BASE",
+    "HC..": "HCHC",
+    "HP..": "HCHP",
+    "HN..": "EJPHN",
+    "PM..": "EJPHPM",
+    "HCJB": "BBRHCJB",
+    "HPJB": "BBRHPJB",
+    "HCJW": "BBRHCJW",
+    "HPJW": "BBRHPJW",
+    "HCJR": "BBRHCJR",
+    "HPJR": "BBRHPJR",
+}
+
+
+def tariff_option(optarif) -> str:
+    """Return the tariff option of an OPTARIF (ie. BASE, HC, EJP, BBR)."""
+    match = re.match(r"[A-Z]+", str(optarif).upper())
+    return match.group(0) if match else None
+
+
+class RemoraCostEngine:
+    """Accounts the cost of the energy consumed from the TeleInfo snapshots.
+    Each snapshot adds the delta of each priced index (in Wh) to the counters
+    of its period, and to the cost of the day, the month and the total, so no
+    history is ever read back. The prices (per kWh) of each index are picked
+    by the tariff option (OPTARIF) of the meter.
+    """
+
+    def __init__(self, hass, coordinator, prices, store=None):
+        """Initialize the engine."""
+        self._hass = hass
+        self._coordinator = coordinator
+        # tariff option -> {index label: price per kWh}
+        self._prices = prices
+        self._store = store
+        self._savePending = False
+        self._listeners = []
+        # index label -> last index
+        self._indexes = {}
+        # index label -> {energy (Wh), cost} accounted
+        self._periods = {}
+        self.today = 0.0
+        self.month = 0.0
+        self.total = 0.0
+        self._day = dt_util.now().date().isoformat()
+        self.period = None
+
+    async def async_load(self) -> None:
+        """Restore the counters."""
+        if self._store is None:
+            return
+        data = await self._store.async_load()
+        if data is None:
+            return
+        self._indexes = data["indexes"]
+        self._periods = data["periods"]
+        self.today = data["today"]
+        self.month = data["month"]
+        self.total = data["total"]
+        self._day = data["day"]
+        self._rollover(dt_util.now())
+
+    def _schedule_save(self) -> None:
+        """Save the counters in the store, unless a save is already pending."""
+        if self._store is None or self._savePending:
+            return
+        self._savePending = True
+        self._store.async_delay_save(self._dump, SAVE_DELAY)
+
+    def _dump(self) -> dict:
+        """Return the state to save."""
+        self._savePending = False
+        return {
+            "indexes": self._indexes,
+            "periods": self._periods,
+            "today": self.today,
+            "month": self.month,
+            "total": self.total,
+            "day": self._day,
+        }
+
+    @property
+    def periods(self) -> dict:
+        """Return the energy (in Wh) and cost accounted per index."""
+        return self._periods
+
+    @property
+    def prices(self) -> dict:
+        """Return the prices of the tariff option of the meter, or None."""
+        teleInfo = self._coordinator.data or {}
+        option = tariff_option(teleInfo.get("OPTARIF", ""))
+        if option in self._prices:
+            return self._prices[option]
+        # A single price table applies whatever the tariff option
+        if len(self._prices) == 1:
+            return next(iter(self._prices.values()))
+        return None
+
+    @property
+    def price(self) -> float:
+        """Return the price of the current tariff period (PTEC), or None."""
+        prices = self.prices
+        if prices is None or self.period is None:
+            return None
+        return prices.get(PTEC_INDEX.get(self.period))
+
+    @callback
+    def async_start(self):
+        """Start following the TeleInfo and return a function stopping it."""
+        removeListener = self._coordinator.async_add_listener(
+            self._async_teleinfo_updated
+        )
+        # The day and month costs restart at midnight even without snapshot
+        cancelMidnight = async_track_time_change(
+            self._hass, self._async_midnight, hour=0, minute=0, second=0
+        )
+
+        def stop():
+            removeListener()
+            cancelMidnight()
+
+        return stop
+
+    @callback
+    def async_add_listener(self, update_callback):
+        """Register update_callback called when the costs change.
+        Return a function removing it."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    def _notify(self) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def _rollover(self, now) -> bool:
+        """Restart the day and month costs when now is in another one."""
+        day = now.date().isoformat()
+        if day == self._day:
+            return False
+        if day[:7] != self._day[:7]:
+            self.month = 0.0
+        self.today = 0.0
+        self._day = day
+        return True
+
+    @callback
+    def _async_midnight(self, now) -> None:
+        if self._rollover(now):
+            self._schedule_save()
+            self._notify()
+
+    @callback
+    def _async_teleinfo_updated(self) -> None:
+        """Account the index deltas of the latest snapshot."""
+        teleInfo = self._coordinator.data
+        if teleInfo is None or not self._coordinator.last_update_success:
+            return
+        changed = self._rollover(dt_util.now())
+        period = teleInfo.get("PTEC")
+        if period != self.period:
+            self.period = period
+            changed = True
+        prices = self.prices
+        if prices is None:
+            if changed:
+                self._notify()
+            return
+        for label, price in prices.items():
+            value = teleInfo.get(label)
+            if not isinstance(value, (int, float)):
+                continue
+            last = self._indexes.get(label)
+            self._indexes[label] = value
+            # First sample, or new meter: restart from this index
+            if last is None or value <= last:
+                continue
+            delta = value - last
+            cost = delta / 1000 * price
+            counters = self._periods.setdefault(label, {"energy": 0, "cost": 0.0})
+            counters["energy"] += delta
+            counters["cost"] += cost
+            self.today += cost
+            self.month += cost
+            self.total += cost
+            changed = True
+        if changed:
+            self._schedule_save()
+            self._notify()
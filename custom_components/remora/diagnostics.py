@@ -0,0 +1,25 @@
+"""Diagnostics support for the Remora devices added from the UI. The devices
+of the YAML configuration have no config entry, their metrics are read from
+their diagnostic sensors."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_REMORA, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return the state and the request metrics of the Remora device of the
+    entry."""
+    return {
+        host: {
+            "available": data[DATA_REMORA].available,
+            "queue_depth": data[DATA_REMORA].queue_depth,
+            "queue_age": data[DATA_REMORA].queue_age,
+            "metrics": data[DATA_REMORA].metrics(),
+        }
+        for host, data in hass.data.get(DOMAIN, {}).items()
+        if host == entry.data[CONF_HOST]
+    }
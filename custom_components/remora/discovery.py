@@ -0,0 +1,141 @@
+"""Discovery of the Remora devices of a local network."""
+import asyncio
+import ipaddress
+import logging
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Boards probed at the same time, and the timeouts of each probe
+DISCOVERY_CONCURRENCY = 128
+DISCOVERY_TIMEOUT = aiohttp.ClientTimeout(total=1.5, sock_connect=0.5)
+# Largest network scanned (a /22), as it is scanned again after each failed
+# probe of a device which stopped answering
+MAX_SCAN_ADDRESSES = 1024
+NB_FILPILOTE = 7
+# TeleInfo labels identifying the meter (historic and standard modes)
+METER_LABELS = ("ADCO", "ADSC")
+
+
+def split_port(host):
+    """Return (address, ':port' or '') of a host."""
+    address, sep, port = host.rpartition(":")
+    if not sep or not port.isdigit():
+        return host, ""
+    return address, sep + port
+
+
+async def async_probe(session, host):
+    """Return the meter address (ADCO) of the Remora device answering at
+    host, '' if it has no TeleInfo, or None if host is not a Remora device.
+    A Remora device answers its heartbeat and lists its Fil Pilote."""
+    baseurl = "http://" + host + "/"
+    try:
+        async with session.get(baseurl + "hb.htm", timeout=DISCOVERY_TIMEOUT) as hb:
+            await hb.read()
+            if hb.status != 200:
+                return None
+        async with session.get(baseurl + "fp", timeout=DISCOVERY_TIMEOUT) as fp:
+            fpjson = await fp.json(content_type=None)
+        if not isinstance(fpjson, dict) or any(
+            "fp" + str(num) not in fpjson for num in range(1, NB_FILPILOTE + 1)
+        ):
+            return None
+        async with session.get(baseurl + "tinfo", timeout=DISCOVERY_TIMEOUT) as tinfo:
+            if tinfo.status != 200:
+                await tinfo.read()
+                return ""
+            teleInfo = await tinfo.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return None
+    for label in METER_LABELS:
+        if isinstance(teleInfo, dict) and label in teleInfo:
+            return str(teleInfo[label])
+    return ""
+
+
+async def async_scan(network, port="", concurrency=DISCOVERY_CONCURRENCY) -> dict:
+    """Probe every address of a network (ie. 192.168.1.0/24) concurrently and
+    return {host: meter address} of the Remora devices found.
+    Raise ValueError for a network of more than MAX_SCAN_ADDRESSES."""
+    addresses = ipaddress.ip_network(network, strict=False)
+    if addresses.num_addresses > MAX_SCAN_ADDRESSES:
+        raise ValueError("Network too large to be scanned: " + str(network))
+    semaphore = asyncio.Semaphore(concurrency)
+    hosts = [str(address) + port for address in addresses.hosts()]
+
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency, force_close=True)
+    ) as session:
+
+        async def async_probe_host(host):
+            async with semaphore:
+                return await async_probe(session, host)
+
+        meters = await asyncio.gather(*(async_probe_host(host) for host in hosts))
+    return {host: meter for host, meter in zip(hosts, meters) if meter is not None}
+
+
+class RemoraLocator:
+    """Finds a Remora device which moved to another address of its network,
+    by the meter address (ADCO) of its TeleInfo. The boards found by the last
+    scans are cached in the store, and checked before scanning again."""
+
+    def __init__(self, store=None):
+        """Initialize the locator."""
+        self._store = store
+        # host -> meter address
+        self._boards = {}
+        self._lock = asyncio.Lock()
+
+    async def async_load(self) -> None:
+        """Restore the boards found by the previous scans."""
+        if self._store is None:
+            return
+        data = await self._store.async_load()
+        if data is not None:
+            self._boards = data["boards"]
+
+    def _save(self) -> None:
+        if self._store is not None:
+            self._store.async_delay_save(lambda: {"boards": self._boards}, 0)
+
+    def learn(self, host, meter) -> None:
+        """Cache the meter address of the board answering at host."""
+        if meter and self._boards.get(host) != meter:
+            self._boards[host] = meter
+            self._save()
+
+    async def async_resolve(self, network, host, meter):
+        """Return the host of the board of a meter address, or None."""
+        if not meter:
+            return None
+        _, port = split_port(host)
+        # Scans of several devices of the same network are not run twice
+        async with self._lock:
+            async with aiohttp.ClientSession() as session:
+                for cached, cachedMeter in list(self._boards.items()):
+                    if (
+                        cachedMeter == meter
+                        and cached != host
+                        and await async_probe(session, cached) == meter
+                    ):
+                        return cached
+            _LOGGER.info("Looking for the Remora device of %s in %s", meter, network)
+            boards = await async_scan(network, port)
+            # The boards found replace the cached ones of the same meters
+            meters = set(boards.values())
+            self._boards = {
+                board: cachedMeter
+                for board, cachedMeter in self._boards.items()
+                if cachedMeter not in meters
+            }
+            self._boards.update(
+                {board: found for board, found in boards.items() if found}
+            )
+            self._save()
+        for board, found in boards.items():
+            if found == meter:
+                return board
+        return None
@@ -0,0 +1,172 @@
+"""Hourly long-term statistics of the TeleInfo energy indexes."""
+import logging
+import math
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+# Delay of the save of the pending hours (flushed anyway at stop)
+SAVE_DELAY = 60
+
+
+class RemoraEnergyStatistics:
+    """Computes the hourly consumption of each energy index from the TeleInfo
+    snapshots and imports the completed hours in bulk as external statistics
+    (remora:<host>_<label>), instead of recording each polled index state.
+    The delta between two snapshots is spread over the hours they span, in
+    proportion of the time spent in each, so the consumption during an outage
+    of Home Assistant is backfilled over the missing hours instead of being
+    reported as one spike. Completed hours are kept until the recorder is
+    loaded to import them.
+    """
+
+    def __init__(self, hass, remoraDevice, coordinator, labels, store=None):
+        """Initialize the statistics."""
+        self._hass = hass
+        self._remora = remoraDevice
+        self._coordinator = coordinator
+        self._labels = labels
+        self._store = store
+        self._savePending = False
+        # label -> {time, index, state, sum, pending: {hour start: delta},
+        # completed: [[hour start, state, sum]] not imported yet}
+        self._indexes = {}
+
+    async def async_load(self) -> None:
+        """Restore the last index samples and the hours not imported yet."""
+        if self._store is None:
+            return
+        data = await self._store.async_load()
+        if data is None:
+            return
+        for label, index in data.items():
+            index["pending"] = {
+                int(hour): delta for hour, delta in index["pending"].items()
+            }
+            index.setdefault("completed", [])
+            self._indexes[label] = index
+
+    def _schedule_save(self) -> None:
+        """Save the indexes in the store, unless a save is already pending."""
+        if self._store is None or self._savePending:
+            return
+        self._savePending = True
+        self._store.async_delay_save(self._dump, SAVE_DELAY)
+
+    def _dump(self) -> dict:
+        """Return the state to save."""
+        self._savePending = False
+        return self._indexes
+
+    @property
+    def labels(self) -> list:
+        """Return the indexes imported as statistics."""
+        return self._labels
+
+    @callback
+    def async_start(self):
+        """Start following the TeleInfo and return a function stopping it."""
+        return self._coordinator.async_add_listener(self._async_teleinfo_updated)
+
+    def statistic_id(self, label) -> str:
+        """Return the id of the external statistic of an index."""
+        return DOMAIN + ":" + slugify(self._remora.host) + "_" + label.lower()
+
+    @callback
+    def _async_teleinfo_updated(self) -> None:
+        """Account the index deltas of the latest snapshot and import the
+        hours it completes."""
+        teleInfo = self._coordinator.data
+        if teleInfo is None or not self._coordinator.last_update_success:
+            return
+        now = dt_util.utcnow().timestamp()
+        for label in self._labels:
+            value = teleInfo.get(label)
+            if isinstance(value, (int, float)):
+                self._add_sample(label, value, now)
+        self._async_import()
+        self._schedule_save()
+
+    def _add_sample(self, label, value, now) -> None:
+        """Spread the delta since the previous sample over the hours it spans,
+        and move the completed hours to the ones to import."""
+        index = self._indexes.get(label)
+        if index is None or value < index["index"] or now <= index["time"]:
+            # First sample, or new meter: restart from this index
+            self._indexes[label] = {
+                "time": now,
+                "index": value,
+                "state": value,
+                "sum": 0 if index is None else index["sum"],
+                "pending": {} if index is None else index["pending"],
+                "completed": [] if index is None else index["completed"],
+            }
+            return
+        delta = value - index["index"]
+        start = index["time"]
+        pending = index["pending"]
+        if delta:
+            hour = math.floor(start / HOUR) * HOUR
+            while hour < now:
+                overlap = min(hour + HOUR, now) - max(hour, start)
+                pending[hour] = pending.get(hour, 0) + delta * overlap / (now - start)
+                hour += HOUR
+        index["time"] = now
+        index["index"] = value
+        # Hours before the current one can't change anymore
+        currentHour = math.floor(now / HOUR) * HOUR
+        for hour in sorted(pending):
+            if hour >= currentHour:
+                break
+            delta = pending.pop(hour)
+            index["state"] += delta
+            index["sum"] += delta
+            index["completed"].append([hour, index["state"], index["sum"]])
+
+    @callback
+    def _async_import(self) -> None:
+        """Import the completed hours of each index in one call per index.
+        They are kept until the recorder is loaded (ie. at startup)."""
+        completed = {
+            label: index["completed"]
+            for label, index in self._indexes.items()
+            if index["completed"]
+        }
+        if not completed:
+            return
+        if "recorder" not in self._hass.config.components:
+            _LOGGER.debug("Recorder not loaded, energy statistics kept to import")
+            return
+        from homeassistant.components.recorder.models import (
+            StatisticData,
+            StatisticMetaData,
+        )
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+        from homeassistant.const import UnitOfEnergy
+
+        for label, hours in completed.items():
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name="Remora " + self._remora.host + " " + label,
+                source=DOMAIN,
+                statistic_id=self.statistic_id(label),
+                unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+            )
+            statistics = [
+                StatisticData(
+                    start=dt_util.utc_from_timestamp(hour),
+                    state=round(state, 3),
+                    sum=round(total, 3),
+                )
+                for hour, state, total in hours
+            ]
+            async_add_external_statistics(self._hass, metadata, statistics)
+            self._indexes[label]["completed"] = []
@@ -0,0 +1,151 @@
+"""Rolling statistics over the recent samples of the numeric TeleInfo labels."""
+from array import array
+from collections import deque
+import math
+
+# Samples kept per label: one hour of TeleInfo fetched every second
+HISTORY_CAPACITY = 3600
+
+
+class TeleInfoHistory:
+    """Fixed size ring buffer of the samples of one TeleInfo label, shared by
+    its rolling windows. Samples are numbered by an increasing sequence, the
+    sample seq being stored at seq % capacity. When the buffer is full, the
+    oldest sample is evicted from the windows before being overwritten.
+    """
+
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        """Initialize the history."""
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Sequence number of the next sample
+        self._next = 0
+        self._windows = {}
+
+    def time(self, seq) -> float:
+        """Return the time of a sample."""
+        return self._times[seq % self._capacity]
+
+    def value(self, seq) -> float:
+        """Return the value of a sample."""
+        return self._values[seq % self._capacity]
+
+    def window(self, duration, binWidth=1) -> "RollingWindow":
+        """Return the rolling window of this duration, created on first use
+        from the samples already recorded."""
+        key = (duration, binWidth)
+        if key not in self._windows:
+            self._windows[key] = RollingWindow(self, duration, binWidth)
+        return self._windows[key]
+
+    def add(self, value, now) -> None:
+        """Record a sample and add it to the windows, in O(1) per window."""
+        seq = self._next
+        if seq >= self._capacity:
+            for window in self._windows.values():
+                window.evict_to(seq - self._capacity + 1)
+        self._times[seq % self._capacity] = now
+        self._values[seq % self._capacity] = value
+        self._next += 1
+        for window in self._windows.values():
+            window.add(seq, value, now)
+
+
+class RollingWindow:
+    """Statistics of the samples of a TeleInfoHistory over the last duration.
+    The sum, the monotonic queues of the min and max candidates and the
+    histogram of the values (by bins of binWidth) are updated when a sample
+    enters or leaves the window, so no sample is ever scanned twice.
+    """
+
+    def __init__(self, history, duration, binWidth):
+        """Initialize the window with the recorded samples still in it."""
+        self._history = history
+        self._duration = duration.total_seconds()
+        self._binWidth = binWidth
+        self._first = max(0, history._next - history._capacity)
+        self._last = self._first
+        self._sum = 0.0
+        self._maxQueue = deque()
+        self._minQueue = deque()
+        self._bins = {}
+        for seq in range(self._first, history._next):
+            self.add(seq, history.value(seq), history.time(seq))
+
+    @property
+    def count(self) -> int:
+        """Return the number of samples in the window."""
+        return self._last - self._first
+
+    def add(self, seq, value, now) -> None:
+        """Add the sample seq, and evict the ones older than the duration."""
+        self.expire(now)
+        self._last = seq + 1
+        self._sum += value
+        while self._maxQueue and self._history.value(self._maxQueue[-1]) <= value:
+            self._maxQueue.pop()
+        self._maxQueue.append(seq)
+        while self._minQueue and self._history.value(self._minQueue[-1]) >= value:
+            self._minQueue.pop()
+        self._minQueue.append(seq)
+        valueBin = math.floor(value / self._binWidth)
+        self._bins[valueBin] = self._bins.get(valueBin, 0) + 1
+
+    def expire(self, now) -> None:
+        """Evict the samples older than the duration."""
+        while (
+            self._first < self._last
+            and self._history.time(self._first) <= now - self._duration
+        ):
+            self._remove()
+
+    def evict_to(self, seq) -> None:
+        """Evict the samples before seq, about to be overwritten."""
+        while self._first < min(seq, self._last):
+            self._remove()
+
+    def _remove(self) -> None:
+        """Evict the oldest sample of the window."""
+        seq = self._first
+        value = self._history.value(seq)
+        self._sum -= value
+        if self._maxQueue[0] == seq:
+            self._maxQueue.popleft()
+        if self._minQueue[0] == seq:
+            self._minQueue.popleft()
+        valueBin = math.floor(value / self._binWidth)
+        self._bins[valueBin] -= 1
+        if not self._bins[valueBin]:
+            del self._bins[valueBin]
+        self._first += 1
+
+    def mean(self) -> float:
+        """Return the mean of the window, or None if it is empty."""
+        if not self.count:
+            return None
+        return self._sum / self.count
+
+    def max(self) -> float:
+        """Return the maximum of the window, or None if it is empty."""
+        if not self.count:
+            return None
+        return self._history.value(self._maxQueue[0])
+
+    def min(self) -> float:
+        """Return the minimum of the window, or None if it is empty."""
+        if not self.count:
+            return None
+        return self._history.value(self._minQueue[0])
+
+    def percentile(self, percent) -> float:
+        """Return the percentile of the window (nearest rank, rounded down to
+        binWidth), or None if it is empty."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        for valueBin in sorted(self._bins):
+            rank -= self._bins[valueBin]
+            if rank <= 0:
+                return valueBin * self._binWidth
+        return None
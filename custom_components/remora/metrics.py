@@ -0,0 +1,79 @@
+"""Runtime metrics of the requests sent to a Remora device."""
+import asyncio
+from bisect import bisect_left
+
+# Upper bounds (in sec) of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Prefix of the latency percentile metrics (ie. latency_p99)
+LATENCY_PERCENTILE = "latency_p"
+
+
+class EndpointMetrics:
+    """Counters and latency histogram of one endpoint of a Remora device."""
+
+    def __init__(self):
+        """Initialize the metrics."""
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        # Requests not sent as the circuit breaker was open
+        self.rejected = 0
+        # Calls served from the cache, or sharing the request of other calls
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.latency_sum = 0.0
+        # Count of requests per bucket, the last one above LATENCY_BUCKETS
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, latency, ex=None) -> None:
+        """Record a request answered, or failed with ex, after latency."""
+        self.requests += 1
+        self.latency_sum += latency
+        self.histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        if isinstance(ex, asyncio.TimeoutError):
+            self.timeouts += 1
+        elif ex is not None:
+            self.errors += 1
+
+    @property
+    def latency_mean(self) -> float:
+        """Return the mean latency (in sec), or None."""
+        if not self.requests:
+            return None
+        return self.latency_sum / self.requests
+
+    def latency_percentile(self, percent) -> float:
+        """Return the upper bound of the bucket holding the percentile of the
+        latencies (None above the last bucket or without request)."""
+        rank = percent / 100 * self.requests
+        count = 0
+        for bound, bucketCount in zip(LATENCY_BUCKETS, self.histogram):
+            count += bucketCount
+            if count and count >= rank:
+                return bound
+        return None
+
+    def value(self, metric):
+        """Return one metric of as_dict, computing only this one."""
+        if metric.startswith(LATENCY_PERCENTILE):
+            return self.latency_percentile(int(metric[len(LATENCY_PERCENTILE) :]))
+        if metric == "latency_histogram":
+            return self.as_dict()[metric]
+        return getattr(self, metric)
+
+    def as_dict(self) -> dict:
+        """Return the metrics as a dict."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "latency_mean": self.latency_mean,
+            "latency_p50": self.latency_percentile(50),
+            "latency_p99": self.latency_percentile(99),
+            "latency_histogram": dict(
+                zip([str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"], self.histogram)
+            ),
+        }
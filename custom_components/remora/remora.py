@@ -1,34 +1,543 @@
+import asyncio
+from collections import deque
 from datetime import timedelta
+from functools import partial
+import logging
+from time import monotonic, time
 
-from homeassistant.util import Throttle
+from .const import COMMAND, FILPILOTE, FNCT_RELAIS, FP, HEARTBEAT, RELAIS, TELEINFO
+from .history import TeleInfoHistory
+from .metrics import EndpointMetrics
 
-MIN_TIME_BETWEEN_UPDATES_REMORA_SENSOR = timedelta(seconds=5)
+_LOGGER = logging.getLogger(__name__)
+
+MIN_TIME_BETWEEN_UPDATES_REMORA_SENSOR = timedelta(seconds=1)
 MIN_TIME_BETWEEN_UPDATES_REMORA_CLIMATE = timedelta(seconds=2)
+# Fil Pilote mode changes arriving within this window are sent as one command
+FP_WRITE_WINDOW = timedelta(milliseconds=100)
+# Period of the write budget of the Fil Pilote commands
+WRITE_BUDGET_PERIOD = timedelta(minutes=1)
+NB_FILPILOTE = 7
+# Consecutive failures opening the circuit breaker, and the schedule of the
+# heartbeat probes run while it is open
+BREAKER_THRESHOLD = 3
+BREAKER_PROBE_DELAY = timedelta(seconds=10)
+BREAKER_PROBE_MAX_DELAY = timedelta(minutes=5)
+# Snapshots are saved at most once per SAVE_DELAY
+SAVE_DELAY = timedelta(seconds=60)
+# Schedule of the replays of the commands which could not be sent
+REPLAY_DELAY = timedelta(seconds=10)
+REPLAY_MAX_DELAY = timedelta(minutes=5)
+
+DEFAULT_FRESHNESS = {
+    TELEINFO: MIN_TIME_BETWEEN_UPDATES_REMORA_SENSOR,
+    FILPILOTE: MIN_TIME_BETWEEN_UPDATES_REMORA_CLIMATE,
+    RELAIS: MIN_TIME_BETWEEN_UPDATES_REMORA_CLIMATE,
+}
+
+
+class RemoraUnavailable(Exception):
+    """Raised without any request while the Remora device is unreachable."""
 
 
 class RemoraDevice:
     """Stores the data retrieved from Remora.
     For each entity to use, acts as the single point responsible for fetching
     updates from the server.
+    Concurrent fetches of the same endpoint share one pending request, and a
+    snapshot younger than its freshness TTL is served from the cache.
+    Successful writes are applied to the cached snapshots and pushed to the
+    listeners, failed writes invalidate the cache.
+    After BREAKER_THRESHOLD consecutive failures, a circuit breaker opens:
+    requests fail fast and only heartbeat probes reach the device, on an
+    exponential schedule, until one succeeds and a full refresh is triggered.
+    With a store, the last snapshots are saved (debounced) and restored at
+    startup.
+    The numeric TeleInfo labels with rolling statistics keep their recent
+    samples in a ring buffer.
+    Commands failing to reach the device are queued, only the last one per
+    Fil Pilote and Relais being kept, and replayed in one batch when the
+    device answers again, or on a bounded exponential schedule.
+    Requests, latencies, errors, cache hits and coalesced calls are counted
+    per endpoint (metrics).
     """
 
-    def __init__(self, host):
-        """Initialize the data object."""
-        import remora
+    def __init__(
+        self,
+        host,
+        freshness=None,
+        session=None,
+        connect_timeout=None,
+        read_timeout=None,
+        poll_semaphore=None,
+        store=None,
+        resolver=None,
+        write_budget=None,
+    ):
+        """Initialize the data object.
+        With a session, requests reuse its pooled connections.
+        With a poll_semaphore, fetches wait for it to be available.
+        With a store (homeassistant.helpers.storage.Store), the snapshots
+        persist across restarts.
+        With a resolver (coroutine function returning the new address of the
+        device, or None), the device is looked for when it stops answering,
+        and again after each failed probe.
+        With a write_budget, at most that many commands with budgeted Fil
+        Pilote changes (ie. thermostat decisions) are sent per minute, the
+        changes made meanwhile being merged in the next one."""
+        if session is None:
+            import remora
+
+            self._remora = remora.RemoraDevice(host)
+        else:
+            from .client import RemoraClient
 
+            self._remora = RemoraClient(host, session, connect_timeout, read_timeout)
         self._host = host
-        self._remora = remora.RemoraDevice(self._host)
+        self._address = host
+        self._resolver = resolver
+        self._resolveTask = None
+        self._pollSemaphore = poll_semaphore
         self._teleInfo = None
         self._filPiloteDic = None
         self._relais = None
+        self._freshness = dict(DEFAULT_FRESHNESS)
+        if freshness is not None:
+            self._freshness.update(freshness)
+        self._pending = {}
+        self._lastFetch = {}
+        self._fpWrites = {}
+        self._fpWaiters = []
+        self._fpFlush = None
+        self._fpWriteLock = asyncio.Lock()
+        self._writeBudget = write_budget
+        # Budgeted changes waiting for the write budget
+        self._fpBudgeted = {}
+        self._fpBudgetedWaiters = []
+        self._fpBudgetedFlush = None
+        # Times of the budgeted commands sent within the last minute
+        self._writeTimes = deque()
+        self._listeners = {}
+        # Called with the {num: fpMode} set by a schedule or a service
+        self._overrideListeners = []
+        self._failures = 0
+        self._breakerOpen = False
+        self._probeDelay = BREAKER_PROBE_DELAY
+        self._probeHandle = None
+        self._store = store
+        self._savePending = False
+        # label -> TeleInfoHistory
+        self._history = {}
+        # fpX, relais or fnct_relais -> (value, queue time)
+        self._queue = {}
+        self._replayDelay = REPLAY_DELAY
+        self._replayHandle = None
+        self._replayTask = None
+        self._metrics = {
+            endpoint: EndpointMetrics()
+            for endpoint in (TELEINFO, FILPILOTE, RELAIS, HEARTBEAT, COMMAND)
+        }
+
+    async def async_load(self) -> None:
+        """Restore the snapshots saved in the store, stale but valid until
+        the first fetch replaces them."""
+        import remora
+
+        if self._store is None:
+            return
+        data = await self._store.async_load()
+        if data is None:
+            return
+        self._teleInfo = data.get(TELEINFO)
+        if data.get(FILPILOTE) is not None:
+            self._filPiloteDic = {
+                fp: remora.FpMode[fpMode] for fp, fpMode in data[FILPILOTE].items()
+            }
+        if data.get(RELAIS) is not None:
+            self._relais = {
+                RELAIS: remora.RelaisEtat[data[RELAIS][RELAIS]],
+                FNCT_RELAIS: remora.RelaisMode[data[RELAIS][FNCT_RELAIS]],
+            }
+        for key, (value, since) in data.get(COMMAND, {}).items():
+            if key == RELAIS:
+                value = remora.RelaisEtat[value]
+            elif key == FNCT_RELAIS:
+                value = remora.RelaisMode[value]
+            else:
+                value = remora.FpMode[value]
+            self._queue[key] = (value, since)
+        if self._queue:
+            self._schedule_replay()
+
+    def _schedule_save(self) -> None:
+        """Save the snapshots in the store, unless a save is already pending."""
+        if self._store is None or self._savePending:
+            return
+        self._savePending = True
+        self._store.async_delay_save(self._dump, SAVE_DELAY.total_seconds())
+
+    def _dump(self) -> dict:
+        """Return the snapshots to save, enums saved by name."""
+        self._savePending = False
+        return {
+            TELEINFO: self._teleInfo,
+            FILPILOTE: None
+            if self._filPiloteDic is None
+            else {fp: fpMode.name for fp, fpMode in self._filPiloteDic.items()},
+            RELAIS: None
+            if self._relais is None
+            else {key: value.name for key, value in self._relais.items()},
+            COMMAND: {
+                key: [value.name, since] for key, (value, since) in self._queue.items()
+            },
+        }
+
+    @property
+    def available(self) -> bool:
+        """Return False while the circuit breaker is open."""
+        return not self._breakerOpen
+
+    def shutdown(self) -> None:
+        """Cancel the scheduled heartbeat probe, command replay and lookup."""
+        if self._probeHandle is not None:
+            self._probeHandle.cancel()
+            self._probeHandle = None
+        if self._replayHandle is not None:
+            self._replayHandle.cancel()
+            self._replayHandle = None
+        if self._resolveTask is not None:
+            self._resolveTask.cancel()
+            self._resolveTask = None
+
+    def resume(self) -> None:
+        """Schedule again the heartbeat probes of an open breaker and the
+        replay of the queued commands, after a shutdown."""
+        if self._breakerOpen and self._probeHandle is None:
+            self._schedule_probe()
+        if self._queue and self._replayHandle is None and self._replayTask is None:
+            self._schedule_replay()
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of commands waiting to be replayed."""
+        return len(self._queue)
+
+    @property
+    def queue_age(self) -> float:
+        """Return the age (in sec) of the oldest queued command, or None."""
+        if not self._queue:
+            return None
+        return max(0, time() - min(since for _, since in self._queue.values()))
+
+    def _enqueue(self, changes) -> None:
+        """Queue the commands of a failed write, replacing the previous ones."""
+        now = time()
+        for key, value in changes.items():
+            queued = self._queue.get(key)
+            if queued is None or queued[0] != value:
+                self._queue[key] = (value, now)
+        if self._replayHandle is None and self._replayTask is None:
+            self._schedule_replay()
+        self._schedule_save()
+        self._notify(COMMAND)
+
+    def _dequeue(self, changes, since) -> None:
+        """Drop the queued commands superseded by a write started at since."""
+        removed = False
+        for key in changes:
+            queued = self._queue.get(key)
+            if queued is not None and queued[1] <= since:
+                del self._queue[key]
+                removed = True
+        if removed:
+            self._schedule_save()
+            self._notify(COMMAND)
+
+    def _schedule_replay(self) -> None:
+        """Schedule the next replay of the queued commands."""
+        self._replayHandle = asyncio.get_running_loop().call_later(
+            self._replayDelay.total_seconds(), self._start_replay
+        )
+        self._replayDelay = min(self._replayDelay * 2, REPLAY_MAX_DELAY)
+
+    def _start_replay(self) -> None:
+        """Replay the queued commands now."""
+        if self._replayHandle is not None:
+            self._replayHandle.cancel()
+            self._replayHandle = None
+        if self._replayTask is None and self._queue:
+            self._replayTask = asyncio.ensure_future(self._async_replay())
+
+    async def _async_replay(self) -> None:
+        """Send the queued commands in one batch, Fil Pilote in one command."""
+        queue = dict(self._queue)
+        writes = []
+        fpModes = {
+            int(key[len(FP):]): value
+            for key, (value, _) in queue.items()
+            if key not in (RELAIS, FNCT_RELAIS)
+        }
+        if fpModes:
+            writes.append(self.async_set_AllFilPilote(fpModes))
+        if RELAIS in queue:
+            writes.append(self.async_set_EtatRelais(queue[RELAIS][0]))
+        if FNCT_RELAIS in queue:
+            writes.append(self.async_set_ModeRelais(queue[FNCT_RELAIS][0]))
+        _LOGGER.info("Replaying %s queued commands to %s", len(queue), self._host)
+        await asyncio.gather(*writes, return_exceptions=True)
+        self._replayTask = None
+        if not self._queue:
+            self._replayDelay = REPLAY_DELAY
+        elif self._replayHandle is None:
+            self._schedule_replay()
+
+    async def _async_request(self, endpoint, request, *args):
+        """Run a request to an endpoint of the Remora device through the
+        circuit breaker."""
+        if self._breakerOpen:
+            self._metrics[endpoint].rejected += 1
+            raise RemoraUnavailable("Remora device " + self._host + " is unreachable")
+        start = monotonic()
+        try:
+            result = await request(*args)
+        except Exception as ex:
+            self._metrics[endpoint].record(monotonic() - start, ex)
+            self._record_failure()
+            raise
+        self._metrics[endpoint].record(monotonic() - start)
+        self._record_success()
+        return result
+
+    def metrics(self) -> dict:
+        """Return the metrics of each endpoint, with the age (in sec) of the
+        last successful snapshot of the fetched ones."""
+        now = monotonic()
+        metrics = {}
+        for endpoint, endpointMetrics in self._metrics.items():
+            metrics[endpoint] = endpointMetrics.as_dict()
+            if endpoint in (TELEINFO, FILPILOTE, RELAIS):
+                lastFetch = self._lastFetch.get(endpoint)
+                metrics[endpoint]["snapshot_age"] = (
+                    None if lastFetch is None else now - lastFetch
+                )
+        return metrics
+
+    def metric(self, endpoint, metric):
+        """Return one metric of an endpoint (see metrics), computing only
+        this one."""
+        if metric == "snapshot_age":
+            lastFetch = self._lastFetch.get(endpoint)
+            return None if lastFetch is None else monotonic() - lastFetch
+        return self._metrics[endpoint].value(metric)
+
+    def _record_success(self) -> None:
+        """Reset the failure count, and close the breaker if it was open."""
+        self._failures = 0
+        if self._breakerOpen:
+            self._breakerOpen = False
+            self._probeDelay = BREAKER_PROBE_DELAY
+            self.shutdown()
+            # One full refresh of everything missed while unreachable
+            for endpoint in (TELEINFO, FILPILOTE, RELAIS):
+                self._invalidate(endpoint)
+            # and the commands missed by the device
+            self._replayDelay = REPLAY_DELAY
+            self._start_replay()
+
+    def _record_failure(self) -> None:
+        """Count a failure, and open the breaker after BREAKER_THRESHOLD."""
+        self._failures += 1
+        if self._breakerOpen or self._failures < BREAKER_THRESHOLD:
+            return
+        self._breakerOpen = True
+        self._schedule_probe()
+        # Entities become unavailable
+        for endpoint in (TELEINFO, FILPILOTE, RELAIS):
+            self._invalidate(endpoint)
+        self._start_resolve()
+
+    def _start_resolve(self) -> None:
+        """Look for the device at another address, unless already looking."""
+        if self._resolver is not None and self._resolveTask is None:
+            self._resolveTask = asyncio.ensure_future(self._async_resolve())
+
+    async def _async_resolve(self) -> None:
+        """Look for the device at another address, and probe it there."""
+        try:
+            address = await self._resolver()
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.error("Unable to look for Remora device %s: %s", self._host, ex)
+            address = None
+        finally:
+            self._resolveTask = None
+        if address is None or address == self._address or not self._breakerOpen:
+            return
+        _LOGGER.warning("Remora device %s moved to %s", self._host, address)
+        self.relocate(address)
+        if self._probeHandle is not None:
+            self._probeHandle.cancel()
+            self._probeHandle = None
+        await self._async_probe(resolve=False)
+
+    @property
+    def address(self) -> str:
+        """Return the address (host[:port]) the requests are sent to."""
+        return self._address
+
+    def relocate(self, address) -> None:
+        """Send the next requests to another address."""
+        self._address = address
+        self._remora.baseurl = "http://" + address + "/"
+
+    def _schedule_probe(self) -> None:
+        """Schedule the next heartbeat probe of an open breaker."""
+        self._probeHandle = asyncio.get_running_loop().call_later(
+            self._probeDelay.total_seconds(),
+            lambda: asyncio.ensure_future(self._async_probe()),
+        )
+        self._probeDelay = min(self._probeDelay * 2, BREAKER_PROBE_MAX_DELAY)
+
+    async def _async_probe(self, resolve=True) -> None:
+        """Probe the device with a heartbeat while the breaker is open.
+        After a failed probe, the device is looked for at another address
+        again, as it may have moved since the last look."""
+        self._probeHandle = None
+        try:
+            await self.async_check_HeartBeat()
+        except Exception:  # pylint: disable=broad-except
+            pass
+        if not self._breakerOpen:
+            return
+        if resolve:
+            self._start_resolve()
+        if self._probeHandle is None:
+            self._schedule_probe()
+
+    def add_listener(self, endpoint, update_callback):
+        """Register update_callback(invalidated) called when the cached
+        snapshot of an endpoint is written through or invalidated.
+        Return a function removing the listener."""
+        listeners = self._listeners.setdefault(endpoint, [])
+        listeners.append(update_callback)
+        return lambda: listeners.remove(update_callback)
+
+    def add_override_listener(self, update_callback):
+        """Register update_callback(fpModes) called when Fil Pilote modes are
+        set over the ones decided by the entities (ie. by a schedule).
+        Return a function removing the listener."""
+        self._overrideListeners.append(update_callback)
+        return lambda: self._overrideListeners.remove(update_callback)
+
+    def _notify(self, endpoint, invalidated=False) -> None:
+        """Call the listeners of an endpoint."""
+        for update_callback in list(self._listeners.get(endpoint, [])):
+            update_callback(invalidated)
+
+    def _write_through(self, endpoint, attr, changes) -> None:
+        """Apply a successful write to the cached snapshot of an endpoint."""
+        snapshot = getattr(self, attr)
+        if snapshot is None:
+            return
+        setattr(self, attr, {**snapshot, **changes})
+        # The written state is now the latest known one
+        self._lastFetch[endpoint] = monotonic()
+        self._schedule_save()
+        self._notify(endpoint)
+
+    def _invalidate(self, endpoint) -> None:
+        """Mark the cached snapshot of an endpoint as stale after an error."""
+        self._lastFetch.pop(endpoint, None)
+        self._notify(endpoint, invalidated=True)
+
+    def snapshot(self, endpoint) -> dict:
+        """Return the cached snapshot of an endpoint."""
+        if endpoint == TELEINFO:
+            return self.TeleInfo
+        if endpoint == FILPILOTE:
+            return self.FilPiloteDic
+        if endpoint == RELAIS:
+            return self.RelaisDic
+        raise ValueError("Unknown Remora endpoint: " + endpoint)
+
+    def _is_fresh(self, endpoint) -> bool:
+        """Return True if the cached snapshot of an endpoint is within its TTL."""
+        lastFetch = self._lastFetch.get(endpoint)
+        fresh = (
+            lastFetch is not None
+            and monotonic() - lastFetch < self._freshness[endpoint].total_seconds()
+        )
+        if fresh:
+            self._metrics[endpoint].cache_hits += 1
+        return fresh
+
+    async def _async_single_flight(self, endpoint, fetch, attr) -> None:
+        """Run fetch into attr, or join the request already in flight for
+        this endpoint."""
+        pending = self._pending.get(endpoint)
+        if pending is None:
+            pending = asyncio.ensure_future(self._async_fetch(endpoint, fetch, attr))
+            self._pending[endpoint] = pending
+            pending.add_done_callback(partial(self._fetch_done, endpoint))
+        else:
+            self._metrics[endpoint].coalesced += 1
+        # A cancelled caller must not cancel the request shared with the others
+        await asyncio.shield(pending)
+
+    async def _async_fetch(self, endpoint, fetch, attr) -> None:
+        """Fetch a snapshot and store it together with its timestamp."""
+        if self._pollSemaphore is None:
+            snapshot = await self._async_request(endpoint, fetch)
+        else:
+            async with self._pollSemaphore:
+                snapshot = await self._async_request(endpoint, fetch)
+        setattr(self, attr, snapshot)
+        self._lastFetch[endpoint] = monotonic()
+        if endpoint == TELEINFO:
+            self._record_history(self._lastFetch[endpoint])
+        self._schedule_save()
+
+    def _fetch_done(self, endpoint, pending) -> None:
+        """Release the pending request of an endpoint."""
+        self._pending.pop(endpoint, None)
+        if not pending.cancelled():
+            # Mark the exception as retrieved if no caller is left to await it
+            pending.exception()
+
+    @property
+    def host(self) -> str:
+        """Return the host of the Remora device."""
+        return self._host
+
+    async def async_update(self, endpoint, force=False) -> dict:
+        """Fetch the latest status of an endpoint and return it."""
+        if endpoint == TELEINFO:
+            await self.async_updateTeleInfo(force)
+        elif endpoint == FILPILOTE:
+            await self.async_updateAllFilPilote(force)
+        elif endpoint == RELAIS:
+            await self.async_updateRelais(force)
+        return self.snapshot(endpoint)
 
     async def async_reset(self) -> bool:
         """Reset remora."""
         return await self._remora.reset()
 
     async def async_check_HeartBeat(self) -> bool:
-        """Get the status from Remora."""
-        return await self._remora.getHeartBeat()
+        """Get the status from Remora.
+        The heartbeat bypasses the circuit breaker and closes it on success."""
+        start = monotonic()
+        try:
+            is_ok = await self._remora.getHeartBeat()
+        except Exception as ex:
+            self._metrics[HEARTBEAT].record(monotonic() - start, ex)
+            self._record_failure()
+            raise
+        self._metrics[HEARTBEAT].record(monotonic() - start)
+        if is_ok:
+            self._record_success()
+        else:
+            self._record_failure()
+        return is_ok
     
     @property
     def TeleInfo(self) -> dict:
@@ -36,50 +545,213 @@ class RemoraDevice:
         """TeleInfo can be None (if the module is not enabled)"""
         return self._teleInfo
 
+    def push_TeleInfo(self, teleInfo) -> None:
+        """Store a TeleInfo frame received from a stream and notify the listeners."""
+        self._teleInfo = teleInfo
+        self._lastFetch[TELEINFO] = monotonic()
+        self._record_history(self._lastFetch[TELEINFO])
+        self._schedule_save()
+        self._notify(TELEINFO)
+
+    def track_statistics(self, label, duration, binWidth=1):
+        """Return the rolling window (history.RollingWindow) of a TeleInfo
+        label over duration. The label samples are recorded from now on."""
+        if label not in self._history:
+            self._history[label] = TeleInfoHistory()
+        return self._history[label].window(duration, binWidth)
+
+    def _record_history(self, now) -> None:
+        """Record the samples of the tracked labels of the latest TeleInfo."""
+        if self._teleInfo is None:
+            return
+        for label, history in self._history.items():
+            value = self._teleInfo.get(label)
+            if isinstance(value, (int, float)):
+                history.add(value, now)
+
     async def async_get_TeleInfo(self) -> dict:
         """Get the status from Remora TeleInfo and return it as a dict."""
         return await self._remora.getTeleInfo()
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES_REMORA_SENSOR)
-    async def async_updateTeleInfo(self, **kwargs) -> None:
+    async def async_updateTeleInfo(self, force=False) -> None:
         """Fetch the latest status from TeleInfo"""
-        self._teleInfo = await self.async_get_TeleInfo()
+        if force or not self._is_fresh(TELEINFO):
+            await self._async_single_flight(
+                TELEINFO, self.async_get_TeleInfo, "_teleInfo"
+            )
 
     @property
     def FilPiloteDic(self) -> dict:
         """Return AllFilPilote."""
         return self._filPiloteDic
 
-    async def async_set_FilPilote(self, num, fpMode) -> bool:
-        return await self._remora.setFilPilote(num, fpMode)
+    async def async_set_FilPilote(self, num, fpMode, budgeted=False) -> bool:
+        """Set the mode of one Fil Pilote, batched with concurrent changes."""
+        return await self.async_set_AllFilPilote({num: fpMode}, budgeted)
+
+    async def async_set_AllFilPilote(
+        self, fpModes, budgeted=False, override=False
+    ) -> bool:
+        """Queue {num: fpMode} changes and wait for the batch sending them.
+        Within a batch, only the last change per Fil Pilote is kept.
+        Budgeted changes (ie. thermostat decisions) wait for the write budget,
+        unless another batch is sent first.
+        Overriding changes (ie. of a schedule) are first passed to the
+        override listeners.
+        """
+        if override:
+            for update_callback in list(self._overrideListeners):
+                update_callback(fpModes)
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        if budgeted and self._writeBudget is not None:
+            self._fpBudgeted.update(fpModes)
+            self._fpBudgetedWaiters.append(waiter)
+            if self._fpBudgetedFlush is None:
+                self._fpBudgetedFlush = loop.call_later(
+                    max(FP_WRITE_WINDOW.total_seconds(), self._budget_delay()),
+                    self._flush_budgeted,
+                )
+        else:
+            self._fpWrites.update(fpModes)
+            self._fpWaiters.append(waiter)
+            if self._fpFlush is None:
+                self._fpFlush = loop.call_later(
+                    FP_WRITE_WINDOW.total_seconds(),
+                    lambda: asyncio.ensure_future(self._async_flush_FilPilote()),
+                )
+        return await asyncio.shield(waiter)
+
+    def _flush_budgeted(self) -> None:
+        """Send the budgeted changes once the write budget allows it."""
+        self._fpBudgetedFlush = None
+        # Out of budget: the changes keep being merged until it allows one
+        delay = self._budget_delay()
+        if delay > 0:
+            self._fpBudgetedFlush = asyncio.get_running_loop().call_later(
+                delay, self._flush_budgeted
+            )
+            return
+        if self._fpFlush is not None:
+            self._fpFlush.cancel()
+            self._fpFlush = None
+        asyncio.ensure_future(self._async_flush_FilPilote())
+
+    def _budget_delay(self) -> float:
+        """Return the seconds to wait before the write budget allows another
+        command with budgeted changes, 0 if it does."""
+        if self._writeBudget is None:
+            return 0
+        period = WRITE_BUDGET_PERIOD.total_seconds()
+        now = monotonic()
+        while self._writeTimes and now - self._writeTimes[0] >= period:
+            self._writeTimes.popleft()
+        if len(self._writeTimes) < self._writeBudget:
+            return 0
+        return self._writeTimes[0] + period - now
+
+    async def _async_flush_FilPilote(self) -> None:
+        """Send the queued Fil Pilote changes as one command, with the pending
+        budgeted ones."""
+        fpWrites, self._fpWrites = self._fpWrites, {}
+        waiters, self._fpWaiters = self._fpWaiters, []
+        self._fpFlush = None
+        if self._fpBudgeted:
+            # Not budgeted changes of the same Fil Pilote win
+            fpWrites = {**self._fpBudgeted, **fpWrites}
+            waiters += self._fpBudgetedWaiters
+            self._fpBudgeted, self._fpBudgetedWaiters = {}, []
+            if self._fpBudgetedFlush is not None:
+                self._fpBudgetedFlush.cancel()
+                self._fpBudgetedFlush = None
+            self._writeTimes.append(monotonic())
+        if not fpWrites:
+            return
+        changes = {FP + str(num): fpMode for num, fpMode in fpWrites.items()}
+        # Calls merged in this batch
+        self._metrics[COMMAND].coalesced += len(waiters) - 1
+        async with self._fpWriteLock:
+            since = time()
+            try:
+                if len(fpWrites) == 1:
+                    ((num, fpMode),) = fpWrites.items()
+                    result = await self._async_request(
+                        COMMAND, self._remora.setFilPilote, num, fpMode
+                    )
+                else:
+                    # Fil Pilote left out of the batch are sent as '-' (unchanged)
+                    result = await self._async_request(
+                        COMMAND,
+                        self._remora.setAllFilPilote,
+                        [fpWrites.get(num) for num in range(1, NB_FILPILOTE + 1)],
+                    )
+            except Exception as ex:  # pylint: disable=broad-except
+                self._invalidate(FILPILOTE)
+                self._enqueue(changes)
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(ex)
+                return
+        # An answered command is never replayed, even if refused
+        self._dequeue(changes, since)
+        if result:
+            self._write_through(FILPILOTE, "_filPiloteDic", changes)
+        else:
+            self._invalidate(FILPILOTE)
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(result)
 
     async def async_get_AllFilPilote(self) -> dict:
         """Get the status from Remora FilPilote and
         return it as a dict."""
         return await self._remora.getAllFilPilote()
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES_REMORA_CLIMATE)
-    async def async_updateAllFilPilote(self, **kwargs) -> None:
+    async def async_updateAllFilPilote(self, force=False) -> None:
         """Fetch the latest status for FilPilote"""
-        self._filPiloteDic = await self.async_get_AllFilPilote()
+        if force or not self._is_fresh(FILPILOTE):
+            await self._async_single_flight(
+                FILPILOTE, self.async_get_AllFilPilote, "_filPiloteDic"
+            )
 
     @property
     def RelaisDic(self) -> dict:
-        """Get latest update if throttle allows.
-        Return the current Mode Relais"""
+        """Return the current Mode Relais"""
         return self._relais
 
     async def async_set_ModeRelais(self, rMode) -> bool:
-        return await self._remora.setFnctRelais(rMode)
+        return await self._async_write_Relais(
+            self._remora.setFnctRelais, rMode, {FNCT_RELAIS: rMode}
+        )
 
     async def async_set_EtatRelais(self, rEtat) -> bool:
-        return await self._remora.setRelais(rEtat)
+        return await self._async_write_Relais(
+            self._remora.setRelais, rEtat, {RELAIS: rEtat}
+        )
+
+    async def _async_write_Relais(self, write, value, changes) -> bool:
+        """Write a Relais value and apply it to the cached RelaisDic."""
+        since = time()
+        try:
+            result = await self._async_request(COMMAND, write, value)
+        except Exception:
+            self._invalidate(RELAIS)
+            self._enqueue(changes)
+            raise
+        self._dequeue(changes, since)
+        if result:
+            self._write_through(RELAIS, "_relais", changes)
+        else:
+            self._invalidate(RELAIS)
+        return result
 
     async def async_get_Relais(self) -> dict:
         """Get the status from Remora Relais"""
         return await self._remora.getRelais()
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES_REMORA_CLIMATE)
-    async def async_updateRelais(self, **kwargs) -> None:
+    async def async_updateRelais(self, force=False) -> None:
         """Fetch the latest status for Relais"""
-        self._relais = await self.async_get_Relais()
+        if force or not self._is_fresh(RELAIS):
+            await self._async_single_flight(
+                RELAIS, self.async_get_Relais, "_relais"
+            )
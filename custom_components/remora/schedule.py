@@ -0,0 +1,130 @@
+"""Weekly schedule of the Fil Pilote zones of a Remora device."""
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def week_minute(now) -> int:
+    """Return the minute of the week (from monday 00:00) of a local time."""
+    return now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+
+
+class RemoraSchedule:
+    """Applies weekly timetables to the Fil Pilote zones.
+    The transitions of all the zones are merged in one list sorted by minute
+    of the week, the zones switching at the same minute sharing one entry, so
+    a single timer is armed for the next transition and its zones are sent
+    in one command. At startup, the transitions missed since the last one
+    applied (saved in the store) are caught up in one command.
+    """
+
+    def __init__(self, hass, remoraDevice, transitions, store=None):
+        """Initialize the schedule from (minute of the week, {fpnum: mode})."""
+        self._hass = hass
+        self._remora = remoraDevice
+        self._store = store
+        merged = {}
+        for minute, changes in transitions:
+            merged.setdefault(minute, {}).update(changes)
+        self._minutes = sorted(merged)
+        self._changes = [merged[minute] for minute in self._minutes]
+        self._unsub = None
+        self._nextIndex = None
+
+    def _when(self, now, minute) -> datetime:
+        """Return the next local time, after now, of a minute of the week."""
+        days = (minute // MINUTES_PER_DAY - now.weekday()) % 7
+        when = datetime.combine(
+            now.date() + timedelta(days=days),
+            time(minute % MINUTES_PER_DAY // 60, minute % 60),
+            tzinfo=now.tzinfo,
+        )
+        if when <= now:
+            when += timedelta(days=7)
+        return when
+
+    def modes_between(self, start, end) -> dict:
+        """Return the last mode set for each zone by the transitions after
+        start and until end (local times, at most one week apart)."""
+        modes = {}
+        count = len(self._minutes)
+        if count == 0 or end <= start:
+            return modes
+        endIndex = bisect_right(self._minutes, week_minute(end))
+        # Walk back from end, newest transition first
+        for step in range(count):
+            index = (endIndex - 1 - step) % count
+            when = self._when(end, self._minutes[index]) - timedelta(days=7)
+            if when <= start:
+                break
+            for fpnum, fpMode in self._changes[index].items():
+                modes.setdefault(fpnum, fpMode)
+        return modes
+
+    async def async_start(self) -> None:
+        """Catch up the transitions missed while stopped and arm the timer."""
+        if not self._minutes:
+            return
+        now = dt_util.now()
+        last = None
+        if self._store is not None:
+            data = await self._store.async_load()
+            if data is not None:
+                last = dt_util.as_local(dt_util.utc_from_timestamp(data["last"]))
+        # Without a previous run, every zone takes its current mode
+        start = now - timedelta(days=7) if last is None else max(
+            last, now - timedelta(days=7)
+        )
+        missed = self.modes_between(start, now)
+        if missed:
+            _LOGGER.info(
+                "Remora %s schedule: catching up %s", self._remora.host, missed
+            )
+            self._hass.async_create_task(self._async_apply(missed, now))
+        self._arm(now)
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the timer."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _arm(self, now) -> None:
+        """Arm the timer of the next transition."""
+        self._nextIndex = bisect_right(self._minutes, week_minute(now)) % len(
+            self._minutes
+        )
+        self._unsub = async_track_point_in_time(
+            self._hass,
+            self._async_transition,
+            self._when(now, self._minutes[self._nextIndex]),
+        )
+
+    async def _async_transition(self, now) -> None:
+        """Apply the zones of the transition due now and arm the next one."""
+        self._unsub = None
+        changes = self._changes[self._nextIndex]
+        self._arm(dt_util.as_local(now))
+        await self._async_apply(changes, now)
+
+    async def _async_apply(self, changes, now) -> None:
+        """Send the modes of the zones in one command."""
+        if self._store is not None:
+            self._store.async_delay_save(lambda: {"last": now.timestamp()}, 0)
+        try:
+            await self._remora.async_set_AllFilPilote(changes, override=True)
+        except Exception as ex:  # pylint: disable=broad-except
+            # The command is replayed when the device answers again
+            _LOGGER.error("Remora %s schedule failed: %s", self._remora.host, ex)
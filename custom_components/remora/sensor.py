@@ -1,11 +1,15 @@
 """Support for Remora TeleInfo sensor."""
 import asyncio
 import logging
+from time import monotonic
 import voluptuous as vol
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.const import (
+    CONF_HOST,
     CONF_RESOURCES,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
     #TIME_SECONDS,
     #TIME_MINUTES,
     UnitOfTime,
@@ -15,6 +19,8 @@ from homeassistant.const import (
     UnitOfEnergy,
     #POWER_VOLT_AMPERE,
     UnitOfApparentPower,
+    UnitOfElectricPotential,
+    UnitOfPower,
 )
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -22,8 +28,29 @@ from homeassistant.components.sensor import (
     SensorStateClass,
     PLATFORM_SCHEMA,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from . import async_remove_entities, get_remora_data
+from .const import (
+    COMMAND,
+    CONF_DISCOVERY,
+    DATA_COORDINATORS,
+    DATA_COST,
+    DATA_ENERGY,
+    DATA_ENTITIES,
+    DATA_REMORA,
+    DATA_SHEDDING,
+    DOMAIN,
+    REFRESH_FAST,
+    REFRESH_ON_CHANGE,
+    REFRESH_SLOW,
+    REFRESH_STATIC,
+    STATISTICS_WINDOWS,
+    TELEINFO,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,174 +62,356 @@ STATE_CLASS = "state_class"
 DESCRIPTION = "description"
 ICON = "icon"
 UNIT = "unit"
+REFRESH = "refresh"
+# Smallest change of a numeric label published to Home Assistant
+DEADBAND = "deadband"
+# Step of the values sent by the meter, the bin width of the percentiles
+RESOLUTION = "resolution"
+# Statistics are published at least this many times per window, as samples
+# leave it even when the label is steady
+STATISTICS_STEPS = 60
+# Attributes shared by the TeleInfo labels of each kind
+TEXT = {ICON: "mdi:counter", REFRESH: REFRESH_ON_CHANGE}
+TEXT_STATIC = {ICON: "mdi:counter", REFRESH: REFRESH_STATIC}
+INDEX = {
+    ICON: "mdi:gauge",
+    REFRESH: REFRESH_SLOW,
+    DEVICE_CLASS: SensorDeviceClass.ENERGY,
+    STATE_CLASS: SensorStateClass.TOTAL,
+    UNIT: UnitOfEnergy.WATT_HOUR,
+}
+REACTIVE_INDEX = {
+    ICON: "mdi:gauge",
+    REFRESH: REFRESH_SLOW,
+    STATE_CLASS: SensorStateClass.TOTAL,
+    UNIT: "VArh",
+}
+CURRENT = {
+    ICON: "mdi:flash",
+    REFRESH: REFRESH_FAST,
+    DEVICE_CLASS: SensorDeviceClass.CURRENT,
+    STATE_CLASS: SensorStateClass.MEASUREMENT,
+    UNIT: UnitOfElectricCurrent.AMPERE,
+}
+CURRENT_STATIC = {
+    ICON: "mdi:mdi-flash-red-eye",
+    REFRESH: REFRESH_STATIC,
+    DEVICE_CLASS: SensorDeviceClass.CURRENT,
+    UNIT: UnitOfElectricCurrent.AMPERE,
+}
+VOLTAGE = {
+    ICON: "mdi:sine-wave",
+    REFRESH: REFRESH_FAST,
+    DEADBAND: 2,
+    DEVICE_CLASS: SensorDeviceClass.VOLTAGE,
+    STATE_CLASS: SensorStateClass.MEASUREMENT,
+    UNIT: UnitOfElectricPotential.VOLT,
+}
+APPARENT_POWER = {
+    ICON: "mdi:flash",
+    REFRESH: REFRESH_FAST,
+    DEADBAND: 20,
+    RESOLUTION: 10,
+    DEVICE_CLASS: SensorDeviceClass.APPARENT_POWER,
+    STATE_CLASS: SensorStateClass.MEASUREMENT,
+    ## Setting the UNIT generate an an incorrect unit of measurement error
+    #UNIT: UnitOfApparentPower.VOLT_AMPERE
+}
+APPARENT_POWER_MAX = {
+    ICON: "mdi:flash-alert",
+    REFRESH: REFRESH_ON_CHANGE,
+    DEVICE_CLASS: SensorDeviceClass.APPARENT_POWER,
+}
+POWER = {
+    ICON: "mdi:flash",
+    REFRESH: REFRESH_ON_CHANGE,
+    DEVICE_CLASS: SensorDeviceClass.POWER,
+    STATE_CLASS: SensorStateClass.MEASUREMENT,
+    UNIT: UnitOfPower.WATT,
+}
+SUBSCRIBED_POWER = {
+    ICON: "mdi:flash-outline",
+    REFRESH: REFRESH_STATIC,
+    DEVICE_CLASS: SensorDeviceClass.APPARENT_POWER,
+}
+
+# TeleInfo labels of the historic and standard (Linky) modes:
+# (label, description, kind[, attributes replacing the ones of the kind])
+TELEINFO_LABELS = (
+    # Historic mode
+    ("ADCO", "Adresse du compteur", TEXT_STATIC),
+    ("OPTARIF", "Option tarifaire choisie", TEXT_STATIC, {ICON: "mdi:mdi-timer-sand"}),
+    ("ISOUSC", "Intensité souscrite", CURRENT_STATIC, {ICON: "mdi:mdi-flash-outline"}),
+    ("BASE", "Index option Base", INDEX),
+    ("HCHC", "Index option Heures Creuses", INDEX),
+    ("HCHP", "Index option Heures Pleines", INDEX),
+    ("EJPHN", "Index option Heures Normales", INDEX),
+    ("EJPHPM", "Index option Heures de Pointe Mobile", INDEX),
+    ("BBRHCJB", "Index option Heures Creuses Jours Bleus", INDEX),
+    ("BBRHPJB", "Index option Heures Pleines Jours Bleus", INDEX),
+    ("BBRHCJW", "Index option Heures Creuses Jours Blancs", INDEX),
+    ("BBRHPJW", "Index option Heures Pleines Jours Blancs", INDEX),
+    ("BBRHCJR", "Index option Heures Creuses Jours Rouges", INDEX),
+    ("BBRHPJR", "Index option Heures Pleines Jours Rouges", INDEX),
+    (
+        "PEJP",
+        "Préavis Début EJP (30 min)",
+        TEXT,
+        {DEVICE_CLASS: SensorDeviceClass.DURATION, UNIT: UnitOfTime.MINUTES},
+    ),
+    ("PTEC", "Période Tarifaire en cours", TEXT, {ICON: "mdi:chart-timeline"}),
+    ("DEMAIN", "Couleur du lendemain", TEXT),
+    ("IINST", "Intensité instantanée", CURRENT),
+    ("IINST1", "Intensité instantanée phase 1", CURRENT),
+    ("IINST2", "Intensité instantanée phase 2", CURRENT),
+    ("IINST3", "Intensité instantanée phase 3", CURRENT),
+    (
+        "ADPS",
+        "Avertissement de Dépassement De Puissance Souscrite",
+        CURRENT,
+        {ICON: "mdi:mdi-flash-red-eye", STATE_CLASS: None},
+    ),
+    ("ADIR1", "Avertissement de Dépassement d'intensité phase 1", CURRENT),
+    ("ADIR2", "Avertissement de Dépassement d'intensité phase 2", CURRENT),
+    ("ADIR3", "Avertissement de Dépassement d'intensité phase 3", CURRENT),
+    ("IMAX", "Intensité maximale", CURRENT_STATIC),
+    ("IMAX1", "Intensité maximale phase 1", CURRENT_STATIC),
+    ("IMAX2", "Intensité maximale phase 2", CURRENT_STATIC),
+    ("IMAX3", "Intensité maximale phase 3", CURRENT_STATIC),
+    ("PMAX", "Puissance maximale triphasée atteinte", POWER),
+    ("PAPP", "Puissance apparente", APPARENT_POWER),
+    ("HHPHC", "Horaire Heures Pleines Heures Creuses", TEXT_STATIC),
+    ("PPOT", "Présence des potentiels", TEXT),
+    # Standard mode
+    ("ADSC", "Adresse Secondaire du Compteur", TEXT_STATIC),
+    ("VTIC", "Version de la TIC", TEXT_STATIC),
+    ("NGTF", "Nom du calendrier tarifaire fournisseur", TEXT_STATIC),
+    ("LTARF", "Libellé tarif fournisseur en cours", TEXT, {ICON: "mdi:chart-timeline"}),
+    ("EAST", "Energie active soutirée totale", INDEX),
+    *(
+        ("EASF%02d" % num, "Energie active soutirée Fournisseur index %02d" % num, INDEX)
+        for num in range(1, 11)
+    ),
+    *(
+        ("EASD%02d" % num, "Energie active soutirée Distributeur index %02d" % num, INDEX)
+        for num in range(1, 5)
+    ),
+    ("EAIT", "Energie active injectée totale", INDEX),
+    *(
+        ("ERQ%d" % num, "Energie réactive Q%d totale" % num, REACTIVE_INDEX)
+        for num in range(1, 5)
+    ),
+    ("IRMS1", "Courant efficace phase 1", CURRENT),
+    ("IRMS2", "Courant efficace phase 2", CURRENT),
+    ("IRMS3", "Courant efficace phase 3", CURRENT),
+    ("URMS1", "Tension efficace phase 1", VOLTAGE),
+    ("URMS2", "Tension efficace phase 2", VOLTAGE),
+    ("URMS3", "Tension efficace phase 3", VOLTAGE),
+    ("UMOY1", "Tension moyenne phase 1", VOLTAGE, {REFRESH: REFRESH_ON_CHANGE}),
+    ("UMOY2", "Tension moyenne phase 2", VOLTAGE, {REFRESH: REFRESH_ON_CHANGE}),
+    ("UMOY3", "Tension moyenne phase 3", VOLTAGE, {REFRESH: REFRESH_ON_CHANGE}),
+    ("PREF", "Puissance app. de référence (kVA)", SUBSCRIBED_POWER),
+    ("PCOUP", "Puissance app. de coupure (kVA)", SUBSCRIBED_POWER),
+    ("SINSTS", "Puissance app. instantanée soutirée", APPARENT_POWER),
+    ("SINSTS1", "Puissance app. instantanée soutirée phase 1", APPARENT_POWER),
+    ("SINSTS2", "Puissance app. instantanée soutirée phase 2", APPARENT_POWER),
+    ("SINSTS3", "Puissance app. instantanée soutirée phase 3", APPARENT_POWER),
+    ("SMAXSN", "Puissance app. max. soutirée n", APPARENT_POWER_MAX),
+    ("SMAXSN1", "Puissance app. max. soutirée n phase 1", APPARENT_POWER_MAX),
+    ("SMAXSN2", "Puissance app. max. soutirée n phase 2", APPARENT_POWER_MAX),
+    ("SMAXSN3", "Puissance app. max. soutirée n phase 3", APPARENT_POWER_MAX),
+    ("SMAXSN-1", "Puissance app. max. soutirée n-1", APPARENT_POWER_MAX),
+    ("SINSTI", "Puissance app. instantanée injectée", APPARENT_POWER),
+    ("SMAXIN", "Puissance app. max. injectée n", APPARENT_POWER_MAX),
+    ("SMAXIN-1", "Puissance app. max. injectée n-1", APPARENT_POWER_MAX),
+    ("CCASN", "Point n de la courbe de charge active soutirée", POWER),
+    ("CCASN-1", "Point n-1 de la courbe de charge active soutirée", POWER),
+    ("CCAIN", "Point n de la courbe de charge active injectée", POWER),
+    ("CCAIN-1", "Point n-1 de la courbe de charge active injectée", POWER),
+    ("STGE", "Registre de Statuts", TEXT),
+    ("MSG1", "Message court", TEXT, {ICON: "mdi:message-text-outline"}),
+    ("MSG2", "Message ultra court", TEXT, {ICON: "mdi:message-text-outline"}),
+    ("PRM", "PRM", TEXT_STATIC),
+    ("RELAIS", "Relais", TEXT),
+    ("NTARF", "Numéro de l'index tarifaire en cours", TEXT),
+    ("NJOURF", "Numéro du jour en cours calendrier fournisseur", TEXT),
+    ("NJOURF+1", "Numéro du prochain jour calendrier fournisseur", TEXT),
+    ("PJOURF+1", "Profil du prochain jour calendrier fournisseur", TEXT),
+    ("PPOINTE", "Profil du prochain jour de pointe", TEXT),
+)
+
 SENSOR_TYPES: dict[str, dict[str, str]] = {
-    "ADCO": {
-        DESCRIPTION: "Adresse du compteur",
-        ICON: "mdi:counter"
-    },
-    "OPTARIF": {        
-        DESCRIPTION: "Option tarifaire choisie",
-        ICON: "mdi:mdi-timer-sand",
+    label: {
+        DESCRIPTION: description,
+        **{
+            key: value
+            for key, value in {**kind, **(overrides[0] if overrides else {})}.items()
+            if value is not None
+        },
+    }
+    for label, description, kind, *overrides in TELEINFO_LABELS
+}
+
+
+CONF_STATISTICS = "statistics"
+CONF_LABEL = "label"
+CONF_WINDOW = "window"
+CONF_STAT = "stat"
+CONF_PERCENTILE = "percentile"
+STAT_MEAN = "mean"
+STAT_MAX = "max"
+STAT_MIN = "min"
+STAT_PERCENTILE = "percentile"
+STAT_DESCRIPTIONS = {
+    STAT_MEAN: "moyenne",
+    STAT_MAX: "max",
+    STAT_MIN: "min",
+    STAT_PERCENTILE: "p",
+}
+# Labels measuring an instantaneous value
+STATISTICS_LABELS = [
+    label
+    for label, sensor_type in SENSOR_TYPES.items()
+    if sensor_type.get(STATE_CLASS) == SensorStateClass.MEASUREMENT
+]
+
+STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_LABEL): vol.All(cv.string, vol.Upper, vol.In(STATISTICS_LABELS)),
+        vol.Optional(CONF_WINDOW, default="15min"): vol.In(STATISTICS_WINDOWS),
+        vol.Optional(CONF_STAT, default=STAT_MEAN): vol.In(STAT_DESCRIPTIONS),
+        vol.Optional(CONF_PERCENTILE, default=95): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+    }
+)
+
+PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
+    {
+        # Remora device providing the TeleInfo, the first one by default
+        vol.Optional(CONF_HOST): cv.string,
+        vol.Required(CONF_RESOURCES, default=[]): vol.All(
+            cv.ensure_list, [cv.string]
+        ),
+        # Add a sensor for each known label sent by the meter
+        vol.Optional(CONF_DISCOVERY, default=False): cv.boolean,
+        # Rolling statistics computed from the recent TeleInfo samples
+        vol.Optional(CONF_STATISTICS, default=[]): vol.All(
+            cv.ensure_list, [STATISTICS_SCHEMA]
+        ),
+    }
+)
+
+SHEDDING_EVENTS = "shed_events"
+SHEDDING_TIME = "time_in_shed"
+SHEDDING_ZONES = "shed_zones"
+SHEDDING_METRICS: dict[str, dict[str, str]] = {
+    SHEDDING_EVENTS: {
+        DESCRIPTION: "Délestages",
+        ICON: "mdi:flash-alert",
+        STATE_CLASS: SensorStateClass.TOTAL_INCREASING,
     },
-    "ISOUSC": {        
-        DESCRIPTION: "Intensité souscrite",
-        ICON: "mdi:mdi-flash-outline",
-        DEVICE_CLASS: SensorDeviceClass.CURRENT,
-        UNIT: UnitOfElectricCurrent.AMPERE
-        #UNIT: ELECTRIC_CURRENT_AMPERE
+    SHEDDING_TIME: {
+        DESCRIPTION: "Durée de délestage",
+        ICON: "mdi:timer-alert",
+        DEVICE_CLASS: SensorDeviceClass.DURATION,
+        STATE_CLASS: SensorStateClass.TOTAL_INCREASING,
+        UNIT: UnitOfTime.SECONDS,
     },
-    "BASE": {        
-        DESCRIPTION: "Index option Base",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+    SHEDDING_ZONES: {
+        DESCRIPTION: "Zones délestées",
+        ICON: "mdi:radiator-off",
     },
-    "HCHC": {        
-        DESCRIPTION: "Index option Heures Creuses",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+}
+
+COST_TODAY = "today"
+COST_MONTH = "month"
+COST_TOTAL = "total"
+COST_METRICS: dict[str, dict[str, str]] = {
+    COST_TODAY: {
+        DESCRIPTION: "Coût du jour",
     },
-    "HCHP": {        
-        DESCRIPTION: "Index option Heures Pleines",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+    COST_MONTH: {
+        DESCRIPTION: "Coût du mois",
     },
-    "EJPHN": {        
-        DESCRIPTION: "Index option Heures Normales",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
+    COST_TOTAL: {
+        DESCRIPTION: "Coût total",
         STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
     },
-    "EJPHPM": {        
-        DESCRIPTION: "Index option Heures de Pointe Mobile",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+}
+
+QUEUE_DEPTH = "queue_depth"
+QUEUE_AGE = "queue_age"
+QUEUE_METRICS: dict[str, dict[str, str]] = {
+    QUEUE_DEPTH: {
+        DESCRIPTION: "Commandes en attente",
+        ICON: "mdi:tray-full",
     },
-    "BBRHCJB": {        
-        DESCRIPTION: "Index option Heures Creuses Jours Bleus",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+    QUEUE_AGE: {
+        DESCRIPTION: "Âge des commandes en attente",
+        ICON: "mdi:timer-sand",
+        DEVICE_CLASS: SensorDeviceClass.DURATION,
+        UNIT: UnitOfTime.SECONDS,
     },
-    "BBRHPJB": {        
-        DESCRIPTION: "Index option Heures Pleines Jours Bleus",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+}
+
+# Request metrics of each endpoint of the device
+METRIC_TYPES: dict[str, dict[str, str]] = {
+    "requests": {
+        DESCRIPTION: "requêtes",
+        ICON: "mdi:swap-horizontal",
+        STATE_CLASS: SensorStateClass.TOTAL_INCREASING,
     },
-    "BBRHCJW": {        
-        DESCRIPTION: "Index option Heures Creuses Jours Blancs",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+    "errors": {
+        DESCRIPTION: "erreurs",
+        ICON: "mdi:alert-circle-outline",
+        STATE_CLASS: SensorStateClass.TOTAL_INCREASING,
     },
-    "BBRHPJW": {        
-        DESCRIPTION: "Index option Heures Pleines Jours Blancs",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+    "timeouts": {
+        DESCRIPTION: "timeouts",
+        ICON: "mdi:timer-off-outline",
+        STATE_CLASS: SensorStateClass.TOTAL_INCREASING,
     },
-    "BBRHCJR": {        
-        DESCRIPTION: "Index option Heures Creuses Jours Rouges",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+    "cache_hits": {
+        DESCRIPTION: "appels servis par le cache",
+        ICON: "mdi:cached",
+        STATE_CLASS: SensorStateClass.TOTAL_INCREASING,
     },
-    "BBRHPJR": {        
-        DESCRIPTION: "Index option Heures Pleines Jours Rouges",
-        ICON: "mdi:gauge",
-        DEVICE_CLASS: SensorDeviceClass.ENERGY,
-        STATE_CLASS: SensorStateClass.TOTAL,
-        UNIT: UnitOfEnergy.WATT_HOUR
-        #UNIT: ENERGY_WATT_HOUR
+    "coalesced": {
+        DESCRIPTION: "appels regroupés",
+        ICON: "mdi:call-merge",
+        STATE_CLASS: SensorStateClass.TOTAL_INCREASING,
     },
-    "PEJP": {        
-        DESCRIPTION: "Préavis Début EJP (30 min)",
-        ICON: "mdi:counter",
+    "latency_p50": {
+        DESCRIPTION: "latence médiane",
+        ICON: "mdi:timer-outline",
         DEVICE_CLASS: SensorDeviceClass.DURATION,
-        UNIT: UnitOfTime.MINUTES
-        #UNIT: TIME_MINUTES
-    },
-    "PTEC": {        
-        DESCRIPTION: "Période Tarifaire en cours",
-        ICON: "mdi:chart-timeline"
-    },
-    "DEMAIN": {        
-        DESCRIPTION: "Couleur du lendemain",
-        ICON: "mdi:counter"
+        UNIT: UnitOfTime.SECONDS,
     },
-    "IINST": {        
-        DESCRIPTION: "Intensité instantanée",
-        ICON: "mdi:flash",
-        DEVICE_CLASS: SensorDeviceClass.CURRENT,
-        STATE_CLASS: SensorStateClass.MEASUREMENT,
-        UNIT: UnitOfElectricCurrent.AMPERE
-        #UNIT: ELECTRIC_CURRENT_AMPERE
-    },
-    "ADPS": {        
-        DESCRIPTION: "Avertissement de Dépassement De Puissance Souscrite",
-        ICON: "mdi:mdi-flash-red-eye",
-        DEVICE_CLASS: SensorDeviceClass.CURRENT,
-        UNIT: UnitOfElectricCurrent.AMPERE
-        #UNIT: ELECTRIC_CURRENT_AMPERE
-    },
-    "IMAX": {        
-        DESCRIPTION: "Intensité maximale",
-        ICON: "mdi:mdi-flash-red-eye",
-        DEVICE_CLASS: SensorDeviceClass.CURRENT,
-        UNIT: UnitOfElectricCurrent.AMPERE
-        #UNIT: ELECTRIC_CURRENT_AMPERE
+    "latency_p99": {
+        DESCRIPTION: "latence p99",
+        ICON: "mdi:timer-outline",
+        DEVICE_CLASS: SensorDeviceClass.DURATION,
+        UNIT: UnitOfTime.SECONDS,
     },
-    "PAPP": {        
-        DESCRIPTION: "Puissance apparente",
-        ICON: "mdi:flash",
-        DEVICE_CLASS: SensorDeviceClass.APPARENT_POWER,
-        STATE_CLASS: SensorStateClass.MEASUREMENT,
-        ## Setting the UNIT generate an an incorrect unit of measurement error
-        #UNIT: UnitOfApparentPower.VOLT_AMPERE
-        #UNIT: POWER_VOLT_AMPERE
+    "snapshot_age": {
+        DESCRIPTION: "âge des données",
+        ICON: "mdi:clock-outline",
+        DEVICE_CLASS: SensorDeviceClass.DURATION,
+        UNIT: UnitOfTime.SECONDS,
     },
-    "HHPHC": {        
-        DESCRIPTION: "Horaire Heures Pleines Heures Creuses",
-        ICON: "mdi:counter"
-    }
 }
 
 
-PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
-    {
-        vol.Required(CONF_RESOURCES, default=[]): vol.All(
-            cv.ensure_list, [vol.In(SENSOR_TYPES)]
-        )
-    }
-)
-
-
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the Remora TeleInfo sensors."""
+    remoraData = get_remora_data(hass, config.get(CONF_HOST))
+    if remoraData is None:
+        _LOGGER.error("Remora device %s is not set up", config.get(CONF_HOST))
+        return
+    coordinator = remoraData[DATA_COORDINATORS][TELEINFO]
+    # Indexes imported as hourly statistics have no per-poll state
+    imported = remoraData[DATA_ENERGY].labels if DATA_ENERGY in remoraData else []
     entities = []
     for resource in config[CONF_RESOURCES]:
         sensor_type = resource.upper()
@@ -211,26 +420,176 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
             _LOGGER.warning(
                 "Sensor type: %s does not appear in TeleInfo output", sensor_type
             )
-            return
+            continue
+
+        if sensor_type in imported:
+            _LOGGER.warning(
+                "Sensor type: %s is imported as statistics, no sensor created",
+                sensor_type,
+            )
+            continue
+
+        entities.append(RemoraTeleInfoSensor(coordinator, sensor_type))
+
+    if config[CONF_DISCOVERY]:
+        # Labels already handled, known or not
+        labels = {entity.type for entity in entities} | set(imported)
+
+        @callback
+        def async_discover() -> None:
+            """Add a sensor for each new label of the TeleInfo."""
+            teleInfo = coordinator.data
+            if teleInfo is None:
+                return
+            discovered = []
+            for label in teleInfo:
+                if label in labels:
+                    continue
+                labels.add(label)
+                if label not in SENSOR_TYPES:
+                    _LOGGER.debug("Unknown TeleInfo label: %s", label)
+                    continue
+                discovered.append(RemoraTeleInfoSensor(coordinator, label))
+            if discovered:
+                async_add_entities(discovered)
+
+        # Labels sent only at times (ie. PEJP) are added when they show up
+        async_discover()
+        stopDiscovery = coordinator.async_add_listener(async_discover)
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, lambda event: stopDiscovery()
+        )
+
+    for statistic in config[CONF_STATISTICS]:
+        entities.append(
+            RemoraStatisticsSensor(coordinator, remoraData[DATA_REMORA], statistic)
+        )
+
+    # Commands waiting for the device to come back
+    for metric in QUEUE_METRICS:
+        entities.append(RemoraQueueSensor(remoraData[DATA_REMORA], metric))
+
+    # Request metrics, disabled by default
+    remoraDevice = remoraData[DATA_REMORA]
+    for endpoint, metrics in remoraDevice.metrics().items():
+        for metric in METRIC_TYPES:
+            if metric in metrics:
+                entities.append(RemoraMetricSensor(remoraDevice, endpoint, metric))
+
+    # Metrics of the load shedding of the device
+    if DATA_SHEDDING in remoraData:
+        engine = remoraData[DATA_SHEDDING]
+        for metric in SHEDDING_METRICS:
+            entities.append(RemoraSheddingSensor(engine, metric))
+
+    # Running cost of the energy consumed
+    if DATA_COST in remoraData:
+        for metric in COST_METRICS:
+            entities.append(RemoraCostSensor(remoraData[DATA_COST], metric))
+
+    async_add_entities(entities)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up the TeleInfo and diagnostic sensors of a Remora device config
+    entry. The TeleInfo sensors follow the options of the entry without any
+    reload."""
+    remoraData = get_remora_data(hass, entry.data[CONF_HOST])
+    remoraDevice = remoraData[DATA_REMORA]
+    coordinator = remoraData[DATA_COORDINATORS][TELEINFO]
+
+    # Commands waiting for the device to come back, and request metrics
+    entities = [RemoraQueueSensor(remoraDevice, metric) for metric in QUEUE_METRICS]
+    for endpoint, metrics in remoraDevice.metrics().items():
+        for metric in METRIC_TYPES:
+            if metric in metrics:
+                entities.append(RemoraMetricSensor(remoraDevice, endpoint, metric))
+    async_add_entities(entities)
+
+    # label -> sensor
+    sensors = {}
+    # Labels sent by the meter since the discovery was switched on
+    discovered = set()
+    stopDiscovery = []
+
+    @callback
+    def async_sync_entities(options) -> None:
+        """Add and remove the sensors whose label was added or removed, and
+        add the ones of the labels sent by the meter when discovering. The
+        discovered sensors are kept when their label leaves the frame (ie.
+        PEJP), until the discovery is switched off."""
+        if options.get(CONF_DISCOVERY) and not stopDiscovery:
+            # Labels sent only at times (ie. PEJP) are added when they show up
+            stopDiscovery.append(
+                coordinator.async_add_listener(
+                    lambda: async_sync_entities(entry.options)
+                )
+            )
+        elif not options.get(CONF_DISCOVERY) and stopDiscovery:
+            stopDiscovery.pop()()
+        if not options.get(CONF_DISCOVERY):
+            discovered.clear()
+        elif coordinator.data is not None:
+            discovered.update(
+                label for label in coordinator.data if label in SENSOR_TYPES
+            )
+        labels = discovered.union(
+            label for label in options.get(CONF_RESOURCES, []) if label in SENSOR_TYPES
+        )
+        async_remove_entities(
+            hass, [sensors.pop(label) for label in list(sensors) if label not in labels]
+        )
+        added = {
+            label: RemoraTeleInfoSensor(
+                coordinator, label, "_".join((DOMAIN, remoraDevice.host, label))
+            )
+            for label in sorted(labels)
+            if label not in sensors
+        }
+        sensors.update(added)
+        if added:
+            async_add_entities(list(added.values()))
 
-        entities.append(RemoraTeleInfoSensor(hass.data[DOMAIN], sensor_type))
+    remoraData[DATA_ENTITIES][Platform.SENSOR] = async_sync_entities
+    async_sync_entities(entry.options)
 
-    async_add_entities(entities, True)
+    @callback
+    def async_stop_discovery() -> None:
+        if stopDiscovery:
+            stopDiscovery.pop()()
 
+    entry.async_on_unload(async_stop_discovery)
 
-class RemoraTeleInfoSensor(SensorEntity):
+
+class RemoraTeleInfoSensor(CoordinatorEntity, SensorEntity):
     """Representation of a Remora TeleInfo Sensor."""
 
-    def __init__(self, remora, sensor_type):
+    def __init__(self, coordinator, sensor_type, unique_id=None):
         """Initialize the sensor."""
-        self._remora = remora
+        # Our label is published when it changes by at least its deadband,
+        # at the cadence of its refresh policy
+        super().__init__(
+            coordinator,
+            (
+                sensor_type,
+                SENSOR_TYPES.get(sensor_type, {}).get(REFRESH, REFRESH_ON_CHANGE),
+                SENSOR_TYPES.get(sensor_type, {}).get(DEADBAND, 0),
+            ),
+        )
         self.type = sensor_type
+        self._attr_unique_id = unique_id
         self._name = SENSOR_PREFIX + SENSOR_TYPES.get( self.type , {}).get(DESCRIPTION)
         self._icon = SENSOR_TYPES.get( self.type, {}).get(ICON)
         self._device_class = SENSOR_TYPES.get( self.type, {}).get(DEVICE_CLASS)
         self._state_class = SENSOR_TYPES.get( self.type, {}).get(STATE_CLASS)
         self._unit = SENSOR_TYPES.get( self.type, {}).get(UNIT)
         self._state = None
+        self._update_state()
+
+    @property
+    def available(self) -> bool:
+        """Return True if the TeleInfo is available."""
+        return self.coordinator.available
 
     @property
     def name(self) -> str:
@@ -263,13 +622,212 @@ class RemoraTeleInfoSensor(SensorEntity):
     def suggested_unit_of_measurement(self) -> str | None:
         return self._unit
         
-    async def async_update(self) -> None:
-        """Get the latest status and use it to update our sensor state."""
-        await self._remora.async_updateTeleInfo()
-        if (
-            self._remora.TeleInfo is None
-            or self.type.upper() not in self._remora.TeleInfo
-        ):
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle a new TeleInfo snapshot pushed by the coordinator."""
+        self._update_state()
+        super()._handle_coordinator_update()
+
+    def _update_state(self) -> None:
+        """Read our label from the latest TeleInfo snapshot."""
+        teleInfo = self.coordinator.data
+        if teleInfo is None or self.type.upper() not in teleInfo:
             self._state = None
         else:
-            self._state = self._remora.TeleInfo[self.type.upper()]
+            self._state = teleInfo[self.type.upper()]
+
+
+class RemoraSheddingSensor(SensorEntity):
+    """Representation of a metric of the Remora load shedding."""
+
+    _attr_should_poll = False
+
+    def __init__(self, engine, metric):
+        """Initialize the sensor."""
+        self._engine = engine
+        self.metric = metric
+        self._attr_name = SENSOR_PREFIX + SHEDDING_METRICS[metric][DESCRIPTION]
+        self._attr_icon = SHEDDING_METRICS[metric].get(ICON)
+        self._attr_device_class = SHEDDING_METRICS[metric].get(DEVICE_CLASS)
+        self._attr_state_class = SHEDDING_METRICS[metric].get(STATE_CLASS)
+        self._attr_native_unit_of_measurement = SHEDDING_METRICS[metric].get(UNIT)
+
+    async def async_added_to_hass(self) -> None:
+        """Run when entity about to be added."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._engine.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self):
+        """Return the metric."""
+        if self.metric == SHEDDING_EVENTS:
+            return self._engine.shed_events
+        if self.metric == SHEDDING_TIME:
+            return round(self._engine.time_in_shed)
+        return ",".join(str(fpnum) for fpnum in self._engine.shed_zones)
+
+
+class RemoraCostSensor(SensorEntity):
+    """Representation of the running cost of the energy consumed."""
+
+    _attr_should_poll = False
+    _attr_icon = "mdi:currency-eur"
+    _attr_device_class = SensorDeviceClass.MONETARY
+
+    def __init__(self, engine, metric):
+        """Initialize the sensor."""
+        self._engine = engine
+        self.metric = metric
+        self._attr_name = SENSOR_PREFIX + COST_METRICS[metric][DESCRIPTION]
+        self._attr_state_class = COST_METRICS[metric].get(STATE_CLASS)
+
+    async def async_added_to_hass(self) -> None:
+        """Run when entity about to be added."""
+        await super().async_added_to_hass()
+        self._attr_native_unit_of_measurement = self.hass.config.currency
+        self.async_on_remove(self._engine.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self) -> float:
+        """Return the cost."""
+        return round(getattr(self._engine, self.metric), 2)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the current tariff period and, for the total, the energy
+        and cost accounted per index."""
+        attributes = {"period": self._engine.period, "price": self._engine.price}
+        if self.metric == COST_TOTAL:
+            for label, counters in self._engine.periods.items():
+                attributes[label.lower() + "_energy"] = counters["energy"]
+                attributes[label.lower() + "_cost"] = round(counters["cost"], 2)
+        return attributes
+
+
+class RemoraStatisticsSensor(CoordinatorEntity, SensorEntity):
+    """Representation of a rolling statistic of a Remora TeleInfo label,
+    computed in memory by the device from its recent samples. It is published
+    when the label changes, and at each step of its window."""
+
+    def __init__(self, coordinator, remoraDevice, statistic):
+        """Initialize the sensor."""
+        self.type = statistic[CONF_LABEL]
+        sensor_type = SENSOR_TYPES[self.type]
+        # The label samples are needed at the fast cadence
+        super().__init__(
+            coordinator, (self.type, REFRESH_FAST, sensor_type.get(DEADBAND, 0))
+        )
+        self._stat = statistic[CONF_STAT]
+        self._percentile = statistic[CONF_PERCENTILE]
+        window = STATISTICS_WINDOWS[statistic[CONF_WINDOW]]
+        self._step = window / STATISTICS_STEPS
+        # Percentiles are exact at the resolution of the meter
+        self._window = remoraDevice.track_statistics(
+            self.type, window, sensor_type.get(RESOLUTION, 1)
+        )
+        description = STAT_DESCRIPTIONS[self._stat]
+        if self._stat == STAT_PERCENTILE:
+            description += str(self._percentile)
+        self._attr_name = (
+            SENSOR_PREFIX
+            + sensor_type[DESCRIPTION]
+            + " "
+            + description
+            + " "
+            + statistic[CONF_WINDOW]
+        )
+        self._attr_icon = sensor_type.get(ICON)
+        self._attr_device_class = sensor_type.get(DEVICE_CLASS)
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = sensor_type.get(UNIT)
+
+    async def async_added_to_hass(self) -> None:
+        """Run when entity about to be added."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, lambda now: self.async_write_ha_state(), self._step
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True if the TeleInfo is available."""
+        return self.coordinator.available
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the statistic over the window."""
+        self._window.expire(monotonic())
+        if self._stat == STAT_MEAN:
+            value = self._window.mean()
+        elif self._stat == STAT_MAX:
+            value = self._window.max()
+        elif self._stat == STAT_MIN:
+            value = self._window.min()
+        else:
+            value = self._window.percentile(self._percentile)
+        return None if value is None else round(value, 1)
+
+
+class RemoraQueueSensor(SensorEntity):
+    """Representation of the queue of the commands to replay to a Remora device."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, remoraDevice, metric):
+        """Initialize the sensor."""
+        self._remora = remoraDevice
+        self.metric = metric
+        self._attr_unique_id = "_".join((DOMAIN, remoraDevice.host, metric))
+        self._attr_name = SENSOR_PREFIX + QUEUE_METRICS[metric][DESCRIPTION]
+        self._attr_icon = QUEUE_METRICS[metric].get(ICON)
+        self._attr_device_class = QUEUE_METRICS[metric].get(DEVICE_CLASS)
+        self._attr_native_unit_of_measurement = QUEUE_METRICS[metric].get(UNIT)
+
+    async def async_added_to_hass(self) -> None:
+        """Run when entity about to be added."""
+        await super().async_added_to_hass()
+        # The age is also polled, as it grows without any change of the queue
+        self.async_on_remove(
+            self._remora.add_listener(
+                COMMAND, lambda invalidated: self.async_write_ha_state()
+            )
+        )
+
+    @property
+    def native_value(self):
+        """Return the metric."""
+        if self.metric == QUEUE_DEPTH:
+            return self._remora.queue_depth
+        queue_age = self._remora.queue_age
+        return None if queue_age is None else round(queue_age)
+
+
+class RemoraMetricSensor(SensorEntity):
+    """Representation of a request metric of an endpoint of a Remora device."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, remoraDevice, endpoint, metric):
+        """Initialize the sensor."""
+        self._remora = remoraDevice
+        self.endpoint = endpoint
+        self.metric = metric
+        self._attr_unique_id = "_".join((DOMAIN, remoraDevice.host, endpoint, metric))
+        self._attr_name = (
+            SENSOR_PREFIX + endpoint + " " + METRIC_TYPES[metric][DESCRIPTION]
+        )
+        self._attr_icon = METRIC_TYPES[metric].get(ICON)
+        self._attr_device_class = METRIC_TYPES[metric].get(DEVICE_CLASS)
+        self._attr_state_class = METRIC_TYPES[metric].get(STATE_CLASS)
+        self._attr_native_unit_of_measurement = METRIC_TYPES[metric].get(UNIT)
+
+    @property
+    def native_value(self):
+        """Return the metric, polled at the scan interval of the platform."""
+        value = self._remora.metric(self.endpoint, self.metric)
+        if isinstance(value, float):
+            return round(value, 3)
+        return value
@@ -0,0 +1,209 @@
+"""Load shedding (délestage) of the Fil Pilote zones driven by the TeleInfo."""
+import logging
+import math
+from time import monotonic
+
+from homeassistant.core import callback
+
+from .const import FP, REFRESH_FAST
+
+_LOGGER = logging.getLogger(__name__)
+
+# Delay of the save of the shed zones (flushed anyway at stop)
+SAVE_DELAY = 10
+
+
+class RemoraSheddingEngine:
+    """Sheds Fil Pilote zones, in priority order, when the instantaneous current
+    (IINST) reaches shed_above x ISOUSC or the meter sends ADPS, and restores
+    them once it stays below restore_below x ISOUSC for restore_delay.
+    Zones shed or restored together are sent in one batched write.
+    It is fed by every TeleInfo snapshot, and makes the TeleInfo fetched at
+    the fast cadence (or streamed).
+    """
+
+    def __init__(
+        self,
+        remoraDevice,
+        coordinator,
+        zones,
+        shed_above,
+        restore_below,
+        zone_current,
+        restore_delay,
+        shed_mode,
+        max_current=None,
+        store=None,
+    ):
+        """Initialize the engine."""
+        self._remora = remoraDevice
+        self._coordinator = coordinator
+        self._zones = zones
+        self._shedAbove = shed_above
+        self._restoreBelow = restore_below
+        self._zoneCurrent = zone_current
+        self._restoreDelay = restore_delay.total_seconds()
+        self._shedMode = shed_mode
+        self._maxCurrent = max_current
+        self._store = store
+        # Zones currently shed, in shedding order, with their mode to restore
+        self._shed = {}
+        # Since when IINST is below the restore threshold, or None
+        self._belowSince = None
+        self._writing = False
+        self._listeners = []
+        self.shed_events = 0
+        self._shedSince = None
+        self._shedTime = 0
+
+    @property
+    def shed_zones(self) -> list:
+        """Return the Fil Pilote currently shed."""
+        return list(self._shed)
+
+    @property
+    def time_in_shed(self) -> float:
+        """Return the total time (in sec) spent with at least one zone shed."""
+        if self._shedSince is None:
+            return self._shedTime
+        return self._shedTime + monotonic() - self._shedSince
+
+    async def async_load(self) -> None:
+        """Restore the shed zones and metrics saved in the store, so zones shed
+        before a restart are restored later."""
+        import remora
+
+        if self._store is None:
+            return
+        data = await self._store.async_load()
+        if data is None:
+            return
+        self._shed = {
+            int(fpnum): remora.FpMode[fpMode] for fpnum, fpMode in data["shed"]
+        }
+        self.shed_events = data["shed_events"]
+        self._shedTime = data["time_in_shed"]
+        if self._shed:
+            self._shedSince = monotonic()
+
+    def _dump(self) -> dict:
+        """Return the state to save, modes saved by name."""
+        return {
+            "shed": [[fpnum, fpMode.name] for fpnum, fpMode in self._shed.items()],
+            "shed_events": self.shed_events,
+            "time_in_shed": self.time_in_shed,
+        }
+
+    @callback
+    def async_start(self):
+        """Start following the TeleInfo and return a function stopping it."""
+        # Every snapshot is needed at the fast cadence, even with a steady
+        # IINST: the zones are restored once restore_delay is over
+        return self._coordinator.async_add_listener(
+            self._async_teleinfo_updated, (None, REFRESH_FAST, 0)
+        )
+
+    @callback
+    def async_add_listener(self, update_callback):
+        """Register update_callback called when the metrics change.
+        Return a function removing it."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _async_teleinfo_updated(self) -> None:
+        """Decide the zones to shed or restore from the latest snapshot."""
+        teleInfo = self._coordinator.data
+        if teleInfo is None or self._writing:
+            return
+        maxCurrent = self._maxCurrent or teleInfo.get("ISOUSC")
+        iinst = teleInfo.get("IINST")
+        if not isinstance(maxCurrent, (int, float)) or not isinstance(
+            iinst, (int, float)
+        ):
+            return
+        self._forget_changed_zones()
+        now = monotonic()
+        if iinst >= self._restoreBelow * maxCurrent:
+            self._belowSince = None
+        elif self._belowSince is None:
+            self._belowSince = now
+        changes = {}
+        if "ADPS" in teleInfo or iinst >= self._shedAbove * maxCurrent:
+            # Shed enough zones to get back under the restore threshold
+            count = max(
+                1, math.ceil((iinst - self._restoreBelow * maxCurrent) / self._zoneCurrent)
+            )
+            for fpnum in self._zones:
+                if count == 0:
+                    break
+                fpMode = self._mode(fpnum)
+                if fpnum in self._shed or fpMode is None or fpMode == self._shedMode:
+                    continue
+                self._shed[fpnum] = fpMode
+                changes[fpnum] = self._shedMode
+                count -= 1
+            if changes:
+                self.shed_events += 1
+        elif (
+            self._shed
+            and self._belowSince is not None
+            and now - self._belowSince >= self._restoreDelay
+        ):
+            # Restore, last shed first, the zones fitting under the restore
+            # threshold, the next ones waiting for another restore_delay
+            margin = self._restoreBelow * maxCurrent - iinst
+            for fpnum in reversed(list(self._shed)):
+                if margin < self._zoneCurrent:
+                    break
+                changes[fpnum] = self._shed.pop(fpnum)
+                margin -= self._zoneCurrent
+            if changes:
+                self._belowSince = now
+        self._update_shed_time(now)
+        if not changes:
+            # The time in shed goes on without any write
+            if self._shed:
+                self._notify()
+            return
+        if self._store is not None:
+            self._store.async_delay_save(self._dump, SAVE_DELAY)
+        self._writing = True
+        self._coordinator.hass.async_create_task(self._async_write(changes))
+
+    def _mode(self, fpnum):
+        """Return the current mode of a Fil Pilote, or None."""
+        fpDic = self._remora.FilPiloteDic
+        if fpDic is None:
+            return None
+        return fpDic.get(FP + str(fpnum))
+
+    def _forget_changed_zones(self) -> None:
+        """Forget the shed zones whose mode was changed by someone else."""
+        for fpnum in list(self._shed):
+            fpMode = self._mode(fpnum)
+            if fpMode is not None and fpMode != self._shedMode:
+                del self._shed[fpnum]
+
+    def _update_shed_time(self, now) -> None:
+        """Account the time spent with at least one zone shed."""
+        if self._shed and self._shedSince is None:
+            self._shedSince = now
+        elif not self._shed and self._shedSince is not None:
+            self._shedTime += now - self._shedSince
+            self._shedSince = None
+
+    async def _async_write(self, changes) -> None:
+        """Send the zones to shed or restore in one batched write."""
+        _LOGGER.info("Remora %s load shedding: %s", self._remora.host, changes)
+        try:
+            await self._remora.async_set_AllFilPilote(changes)
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.error("Remora %s load shedding failed: %s", self._remora.host, ex)
+        finally:
+            self._writing = False
+        self._notify()
+
+    def _notify(self) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
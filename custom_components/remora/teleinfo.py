@@ -0,0 +1,203 @@
+"""Streaming TeleInfo ingest from a serial device or a TCP socket (ie. ser2net).
+Frames are decoded by an incremental, checksum-validating parser supporting
+both the historic and the standard (Linky) TIC modes.
+"""
+import asyncio
+import logging
+from time import monotonic
+
+_LOGGER = logging.getLogger(__name__)
+
+STX = 0x02
+ETX = 0x03
+EOT = 0x04
+LF = 0x0A
+CR = 0x0D
+SP = 0x20
+HT = 0x09
+
+# Longest group accepted, longer ones are garbage from a desynchronised stream
+MAX_GROUP_LENGTH = 128
+# Numeric labels which are identifiers or words and must be kept as strings
+STRING_LABELS = {"ADCO", "ADSC", "PRM", "MOTDETAT"}
+TCP_PREFIX = "tcp://"
+RECONNECT_DELAY = 10
+# Seconds without any frame (a few frame periods) after which the stream is
+# considered broken and reopened
+FRAME_TIMEOUT = 10
+
+
+def checksum(body) -> int:
+    """Return the TIC checksum of the bytes of a group."""
+    return (sum(body) & 0x3F) + 0x20
+
+
+def decode_group(group):
+    """Decode a LF..CR group and return (label, value),
+    or None if it is malformed or its checksum is invalid.
+    Standard mode groups are separated by HT, and may hold an horodate:
+        LABEL HT [HORODATE HT] VALUE HT CHECKSUM
+    Historic mode groups are separated by SP:
+        LABEL SP VALUE SP CHECKSUM
+    """
+    if len(group) < 4:
+        return None
+    if group[-2] == HT:
+        # Standard mode: the checksum includes the last separator
+        if checksum(group[:-1]) != group[-1]:
+            return None
+        fields = group[:-2].split(b"\t")
+    elif group[-2] == SP:
+        # Historic mode: the checksum excludes the last separator
+        if checksum(group[:-2]) != group[-1]:
+            return None
+        fields = group[:-2].split(b" ", 1)
+    else:
+        return None
+    if len(fields) < 2:
+        return None
+    label = fields[0].decode("ascii", "replace")
+    value = fields[-1].decode("ascii", "replace")
+    # Groups made of an horodate only (ie. DATE) hold it as their value
+    if not value and len(fields) == 3:
+        value = fields[1].decode("ascii", "replace")
+    if value.isdigit() and label not in STRING_LABELS:
+        return label, int(value)
+    return label, value
+
+
+class TeleInfoParser:
+    """Incremental TIC parser: feed it the bytes read from the stream and get
+    back the frames completed so far, as {label: value} dicts.
+    """
+
+    def __init__(self):
+        """Initialize the parser."""
+        self._frame = None
+        self._group = None
+        self.invalid_groups = 0
+
+    def feed(self, data) -> list:
+        """Parse a chunk of the stream and return the completed frames."""
+        frames = []
+        for byte in data:
+            # Serial links are 7E1, drop any parity bit left by the reader
+            byte &= 0x7F
+            if byte == STX:
+                self._frame = {}
+                self._group = None
+            elif self._frame is None:
+                # Wait for the start of the next frame
+                continue
+            elif byte == ETX:
+                if self._frame:
+                    frames.append(self._frame)
+                self._frame = None
+                self._group = None
+            elif byte == EOT:
+                # The meter interrupted the frame
+                self._frame = None
+                self._group = None
+            elif byte == LF:
+                self._group = bytearray()
+            elif self._group is None:
+                continue
+            elif byte == CR:
+                decoded = decode_group(self._group)
+                if decoded is None:
+                    self.invalid_groups += 1
+                else:
+                    self._frame[decoded[0]] = decoded[1]
+                self._group = None
+            elif len(self._group) < MAX_GROUP_LENGTH:
+                self._group.append(byte)
+            else:
+                self.invalid_groups += 1
+                self._group = None
+        return frames
+
+
+class TeleInfoStream:
+    """Reads TIC frames from a serial device (ie. /dev/ttyUSB0) or a TCP socket
+    (ie. tcp://192.168.1.10:2000) and passes each decoded frame to on_frame.
+    The connection is reopened after any error, or when no frame was decoded
+    for FRAME_TIMEOUT, the error being passed to on_error.
+    """
+
+    def __init__(self, source, baudrate, on_frame, on_error=None):
+        """Initialize the stream."""
+        self._source = source
+        self._baudrate = baudrate
+        self._on_frame = on_frame
+        self._on_error = on_error
+        self._task = None
+
+    def start(self) -> None:
+        """Start reading the stream in the background."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Stop reading the stream."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _async_open(self):
+        """Open the source and return its (reader, writer)."""
+        if self._source.startswith(TCP_PREFIX):
+            host, _, port = self._source[len(TCP_PREFIX) :].rpartition(":")
+            return await asyncio.open_connection(host, int(port))
+        import serial
+        import serial_asyncio
+
+        return await serial_asyncio.open_serial_connection(
+            url=self._source,
+            baudrate=self._baudrate,
+            bytesize=serial.SEVENBITS,
+            parity=serial.PARITY_EVEN,
+            stopbits=serial.STOPBITS_ONE,
+        )
+
+    async def _async_run(self) -> None:
+        """Read and decode the stream until stopped."""
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._async_open()
+                parser = TeleInfoParser()
+                lastFrame = monotonic()
+                while True:
+                    # Bytes which never make up a valid frame don't count
+                    try:
+                        data = await asyncio.wait_for(
+                            reader.read(1024), lastFrame + FRAME_TIMEOUT - monotonic()
+                        )
+                    except asyncio.TimeoutError as ex:
+                        raise ConnectionError(
+                            "no TeleInfo frame for " + str(FRAME_TIMEOUT) + " sec"
+                        ) from ex
+                    if not data:
+                        raise ConnectionError("TeleInfo stream closed")
+                    for frame in parser.feed(data):
+                        lastFrame = monotonic()
+                        self._on_frame(frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:  # pylint: disable=broad-except
+                if self._on_error is not None:
+                    self._on_error(ex)
+                _LOGGER.warning(
+                    "TeleInfo stream %s failed (%s), reconnecting in %s sec",
+                    self._source,
+                    ex,
+                    RECONNECT_DELAY,
+                )
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(RECONNECT_DELAY)
@@ -0,0 +1,108 @@
+"""Tests of the discovery of the Remora devices, against simulated boards
+listening on loopback addresses."""
+import asyncio
+
+import pytest
+import voluptuous as vol
+
+from custom_components.remora import network
+from custom_components.remora.discovery import (
+    RemoraLocator,
+    async_probe,
+    async_scan,
+    split_port,
+)
+from remora_simulator import RemoraSimulator
+
+NETWORK = "127.0.0.0/29"
+
+
+async def start_boards():
+    """Start two boards of different meters on the same port."""
+    boardA = RemoraSimulator()
+    boardB = RemoraSimulator()
+    boardB.teleinfo["ADCO"] = "999999999999"
+    hostA = await boardA.start("127.0.0.2", 0)
+    _, port = split_port(hostA)
+    hostB = await boardB.start("127.0.0.3", int(port[1:]))
+    return (boardA, hostA), (boardB, hostB), port
+
+
+def test_split_port():
+    assert split_port("192.168.1.10:8080") == ("192.168.1.10", ":8080")
+    assert split_port("192.168.1.10") == ("192.168.1.10", "")
+
+
+def test_network():
+    assert network("192.168.1.0/24") == "192.168.1.0/24"
+    assert network("192.168.0.0/22") == "192.168.0.0/22"
+    with pytest.raises(vol.Invalid):
+        network("192.168.0.0/16")
+    with pytest.raises(vol.Invalid):
+        network("not a network")
+
+
+def test_scan_too_large():
+    with pytest.raises(ValueError):
+        asyncio.run(async_scan("10.0.0.0/8"))
+
+
+def test_scan():
+    async def run():
+        (boardA, hostA), (boardB, hostB), port = await start_boards()
+        try:
+            return hostA, hostB, await async_scan(NETWORK, port)
+        finally:
+            await boardA.stop()
+            await boardB.stop()
+
+    hostA, hostB, found = asyncio.run(run())
+    assert found == {hostA: "012345678901", hostB: "999999999999"}
+
+
+def test_probe_no_teleinfo():
+    async def run():
+        board = RemoraSimulator()
+        board.teleinfo = {}
+        host = await board.start()
+        try:
+            import aiohttp
+
+            async with aiohttp.ClientSession() as session:
+                return await async_probe(session, host)
+        finally:
+            await board.stop()
+
+    assert asyncio.run(run()) == ""
+
+
+def test_resolve():
+    async def run():
+        (boardA, hostA), (boardB, hostB), port = await start_boards()
+        locator = RemoraLocator()
+        try:
+            # Found by a scan, which caches all the boards found
+            moved = await locator.async_resolve(
+                NETWORK, "127.0.0.5" + port, "999999999999"
+            )
+            assert moved == hostB
+            assert locator._boards == {
+                hostA: "012345678901",
+                hostB: "999999999999",
+            }
+            # Found in the cache without scanning
+            scans = boardA.requests.get("/hb.htm", 0)
+            moved = await locator.async_resolve(
+                NETWORK, "127.0.0.6" + port, "012345678901"
+            )
+            assert moved == hostA
+            assert boardB.requests.get("/hb.htm", 0) == 1
+            assert boardA.requests["/hb.htm"] == scans + 1
+            # Unknown meter
+            assert await locator.async_resolve(NETWORK, hostA, "123") is None
+            assert await locator.async_resolve(NETWORK, hostA, "") is None
+        finally:
+            await boardA.stop()
+            await boardB.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,181 @@
+"""Tests of the TeleInfo parser and stream, with recorded historic and
+standard (Linky) frames replayed over a socket."""
+import asyncio
+from datetime import timedelta
+
+from custom_components.remora import teleinfo
+from custom_components.remora.coordinator import RemoraTeleInfoCoordinator
+from custom_components.remora.remora import RemoraDevice
+from custom_components.remora.teleinfo import (
+    TeleInfoParser,
+    TeleInfoStream,
+    decode_group,
+)
+
+# Historic mode frame, 1200 bauds: LF label SP value SP checksum CR
+HISTORIC_FRAME = (
+    b"\x02"
+    b"\nADCO 524563565245 K\r"
+    b"\nOPTARIF HC.. <\r"
+    b"\nISOUSC 20 8\r"
+    b"\nPTEC HP..  \r"
+    b"\nPAPP 00290 ,\r"
+    b"\nHHPHC D /\r"
+    b"\nMOTDETAT 000000 B\r"
+    b"\x03"
+)
+# Standard mode frame, 9600 bauds: LF label HT [horodate HT] value HT
+# checksum CR
+STANDARD_FRAME = (
+    b"\x02"
+    b"\nADSC\t041876097505\tA\r"
+    b"\nVTIC\t02\tJ\r"
+    b"\nDATE\tE230115143503\t\t:\r"
+    b"\nEAST\t007306398\t3\r"
+    b"\nSINSTS\t00709\tV\r"
+    b"\nSMAXSN\tE230115044519\t02210\t2\r"
+    b"\nSTGE\t003A0001\t:\r"
+    b"\nMSG1\tPAS DE          MESSAGE         \t<\r"
+    b"\nRELAIS\t000\tB\r"
+    b"\x03"
+)
+
+
+def test_historic_frame():
+    assert TeleInfoParser().feed(HISTORIC_FRAME) == [
+        {
+            "ADCO": "524563565245",
+            "OPTARIF": "HC..",
+            "ISOUSC": 20,
+            "PTEC": "HP..",
+            "PAPP": 290,
+            "HHPHC": "D",
+            "MOTDETAT": "000000",
+        }
+    ]
+
+
+def test_standard_frame():
+    assert TeleInfoParser().feed(STANDARD_FRAME) == [
+        {
+            "ADSC": "041876097505",
+            "VTIC": 2,
+            "DATE": "E230115143503",
+            "EAST": 7306398,
+            "SINSTS": 709,
+            "SMAXSN": 2210,
+            "STGE": "003A0001",
+            "MSG1": "PAS DE          MESSAGE         ",
+            "RELAIS": 0,
+        }
+    ]
+
+
+def test_checksum_rejected():
+    assert decode_group(b"PAPP 00290 ,") == ("PAPP", 290)
+    assert decode_group(b"PAPP 00291 ,") is None
+    assert decode_group(b"SINSTS\t00709\tV") == ("SINSTS", 709)
+    assert decode_group(b"SINSTS\t00709\tW") is None
+    parser = TeleInfoParser()
+    frames = parser.feed(HISTORIC_FRAME.replace(b"PAPP 00290", b"PAPP 00999"))
+    assert "PAPP" not in frames[0] and frames[0]["ISOUSC"] == 20
+    assert parser.invalid_groups == 1
+
+
+def test_split_and_resynchronised():
+    parser = TeleInfoParser()
+    # Starts in the middle of a frame, split in small chunks, with the
+    # parity bit set by a 8 bits reader
+    data = HISTORIC_FRAME[30:] + bytes(byte | 0x80 for byte in STANDARD_FRAME)
+    frames = []
+    for start in range(0, len(data), 7):
+        frames += parser.feed(data[start : start + 7])
+    assert len(frames) == 1 and frames[0]["SINSTS"] == 709
+
+
+def test_interrupted_frame():
+    frames = TeleInfoParser().feed(
+        HISTORIC_FRAME[:40] + b"\x04" + STANDARD_FRAME
+    )
+    assert len(frames) == 1 and "ADSC" in frames[0]
+
+
+async def replay(frames, on_frame, on_error, wait):
+    """Serve the frames over a socket, then stay silent, to a stream."""
+
+    async def handle(reader, writer):
+        for frame in frames:
+            writer.write(frame)
+            await writer.drain()
+        await asyncio.sleep(wait)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    stream = TeleInfoStream(
+        "tcp://127.0.0.1:" + str(port), 1200, on_frame, on_error
+    )
+    stream.start()
+    await asyncio.sleep(wait)
+    await stream.async_stop()
+    server.close()
+    await server.wait_closed()
+
+
+def test_stream(monkeypatch):
+    monkeypatch.setattr(teleinfo, "FRAME_TIMEOUT", 5)
+    frames = []
+    errors = []
+    asyncio.run(
+        replay(
+            [HISTORIC_FRAME[:50], HISTORIC_FRAME[50:] + STANDARD_FRAME],
+            frames.append,
+            errors.append,
+            0.2,
+        )
+    )
+    assert [frame.get("PAPP", frame.get("SINSTS")) for frame in frames] == [
+        290,
+        709,
+    ]
+    assert errors == []
+
+
+def test_frame_timeout(monkeypatch):
+    """A stream sending no frame for FRAME_TIMEOUT marks the TeleInfo
+    failed until the next frame."""
+    from homeassistant.core import HomeAssistant
+
+    monkeypatch.setattr(teleinfo, "FRAME_TIMEOUT", 0.2)
+    monkeypatch.setattr(teleinfo, "RECONNECT_DELAY", 5)
+
+    async def run():
+        hass = HomeAssistant()
+        remora = RemoraDevice("localhost")
+        coordinator = RemoraTeleInfoCoordinator(
+            hass, remora, timedelta(seconds=30), streaming=True
+        )
+        successes = []
+        coordinator.async_add_listener(
+            lambda: successes.append(coordinator.last_update_success)
+        )
+
+        def on_frame(frame):
+            remora.push_TeleInfo(frame)
+            successes.append(coordinator.last_update_success)
+
+        errors = []
+
+        def on_error(ex):
+            errors.append(ex)
+            coordinator.async_set_update_error(ex)
+
+        # Bytes which never make up a frame don't keep the stream alive
+        await replay([HISTORIC_FRAME, b"\n\r\nPAPP"], on_frame, on_error, 0.5)
+        return coordinator, successes, errors
+
+    coordinator, successes, errors = asyncio.run(run())
+    assert coordinator.data["PAPP"] == 290
+    assert len(errors) == 1 and "no TeleInfo frame" in str(errors[0])
+    assert not coordinator.last_update_success
+    assert successes[0] is True and successes[-1] is False
@@ -0,0 +1,201 @@
+"""Benchmark of the Remora integration against the local simulator.
+
+Runs Home Assistant with the integration (7 Fil Pilote zones, the Relais and
+20 TeleInfo sensors by default) against tools/remora_simulator.py and reports:
+- the HTTP requests per minute received by the simulator, per path
+- the p50 / p99 latency between a TeleInfo change on the simulator and the
+  state of the PAPP sensor showing it
+- the state writes per minute, per entity
+- the timers scheduled per minute on the event loop (its wakeups)
+It exits with status 1 when the requests per minute, the p99 latency or the
+state writes per minute exceed their budget, so it can run in CI.
+
+    python tools/benchmark.py --duration 60 --latency 0.05 --jitter 0.02
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+from time import monotonic
+
+from homeassistant import bootstrap, config_entries
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+sys.path.insert(0, os.path.dirname(__file__))
+from remora_simulator import RemoraSimulator  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TELEINFO_SENSORS = [
+    "ADCO",
+    "OPTARIF",
+    "ISOUSC",
+    "BASE",
+    "HCHC",
+    "HCHP",
+    "EJPHN",
+    "EJPHPM",
+    "BBRHCJB",
+    "BBRHPJB",
+    "BBRHCJW",
+    "BBRHPJW",
+    "BBRHCJR",
+    "BBRHPJR",
+    "PEJP",
+    "PTEC",
+    "DEMAIN",
+    "IINST",
+    "IMAX",
+    "PAPP",
+]
+
+
+def percentile(values, percent):
+    """Return the percentile of values (nearest rank), or None."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, int(round(percent / 100 * len(values))) - 1)]
+
+
+async def run(args) -> dict:
+    simulator = RemoraSimulator(
+        args.latency, args.jitter, args.failure_rate, args.change_interval
+    )
+    address = await simulator.start()
+
+    with tempfile.TemporaryDirectory() as configDir:
+        # The integration is loaded from the custom_components of the repository
+        os.symlink(
+            os.path.join(ROOT, "custom_components"),
+            os.path.join(configDir, "custom_components"),
+        )
+        hass = HomeAssistant()
+        hass.config.config_dir = configDir
+        hass.config.skip_pip = True
+        # Core setup of homeassistant.bootstrap, without any other integration
+        await bootstrap.load_registries(hass)
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+        await hass.async_start()
+
+        # Timers scheduled on the event loop
+        loop = asyncio.get_running_loop()
+        timers = [0]
+        call_at = loop.call_at
+
+        def counting_call_at(*callArgs, **kwargs):
+            timers[0] += 1
+            return call_at(*callArgs, **kwargs)
+
+        loop.call_at = counting_call_at
+
+        writes = {}
+        latencies = []
+
+        def state_changed(event):
+            entity_id = event.data["entity_id"]
+            writes[entity_id] = writes.get(entity_id, 0) + 1
+            newState = event.data.get("new_state")
+            if entity_id == "sensor.remora_puissance_apparente" and newState:
+                try:
+                    changedAt = simulator.changes.get(int(newState.state))
+                except ValueError:
+                    return
+                if changedAt is not None:
+                    latencies.append(monotonic() - changedAt)
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, state_changed)
+
+        config = {
+            "remora": {"host": address},
+            "sensor": [{"platform": "remora", "resources": TELEINFO_SENSORS}],
+            "climate": [
+                {
+                    "platform": "remora",
+                    "filpilote": [{"fp": num} for num in range(1, 8)],
+                    "relais": True,
+                }
+            ],
+        }
+        for domain in ("remora", "sensor", "climate"):
+            await async_setup_component(hass, domain, config)
+        await hass.async_block_till_done()
+
+        # Only the steady state is measured
+        simulator.requests.clear()
+        writes.clear()
+        latencies.clear()
+        timers[0] = 0
+        await asyncio.sleep(args.duration)
+        loop.call_at = call_at
+
+        await hass.async_stop()
+    await simulator.stop()
+
+    minutes = args.duration / 60
+    results = {
+        "requests": sum(simulator.requests.values()) / minutes,
+        "p99": percentile(latencies, 99),
+        "writes": sum(writes.values()) / minutes,
+    }
+    print("Duration: %s sec" % args.duration)
+    print("Requests/min: %.1f" % results["requests"])
+    for path, count in sorted(simulator.requests.items()):
+        print("  %-30s %.1f" % (path, count / minutes))
+    if latencies:
+        print(
+            "Update latency: p50 %.3f sec, p99 %.3f sec (%s updates)"
+            % (percentile(latencies, 50), results["p99"], len(latencies))
+        )
+    else:
+        print("Update latency: no update")
+    print("State writes/min: %.1f" % results["writes"])
+    for entity_id, count in sorted(writes.items()):
+        print("  %-50s %.1f" % (entity_id, count / minutes))
+    print("Timers/min: %.1f" % (timers[0] / minutes))
+    return results
+
+
+def over_budget(results, args) -> list:
+    """Return the messages of the results exceeding their budget."""
+    failures = []
+    if results["requests"] > args.max_requests:
+        failures.append(
+            "Requests/min %.1f above %s" % (results["requests"], args.max_requests)
+        )
+    if results["p99"] is None:
+        failures.append("No update of the PAPP sensor")
+    elif results["p99"] > args.max_p99:
+        failures.append(
+            "p99 update latency %.3f sec above %s" % (results["p99"], args.max_p99)
+        )
+    if results["writes"] > args.max_writes:
+        failures.append(
+            "State writes/min %.1f above %s" % (results["writes"], args.max_writes)
+        )
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=60, help="in sec")
+    parser.add_argument("--latency", type=float, default=0.0, help="in sec")
+    parser.add_argument("--jitter", type=float, default=0.0, help="in sec")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--change-interval", type=float, default=1.0, help="in sec")
+    # Budgets of the default configuration: TeleInfo every 2 sec for PAPP,
+    # Fil Pilote and Relais every 30 sec
+    parser.add_argument("--max-requests", type=float, default=45, help="per min")
+    parser.add_argument("--max-p99", type=float, default=2.5, help="in sec")
+    parser.add_argument("--max-writes", type=float, default=200, help="per min")
+    parser.add_argument("--debug", action="store_true")
+    parsedArgs = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if parsedArgs.debug else logging.WARNING)
+    failures = over_budget(asyncio.run(run(parsedArgs)), parsedArgs)
+    for failure in failures:
+        print("FAILED: " + failure)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,170 @@
+"""Local stand-in for the REST API of a Remora device.
+
+Serves hb.htm, tinfo, fp, relais, reset and the fp, setfp, relais and frelais
+commands like the Remora firmware, with a configurable latency, jitter and
+failure rate. The TeleInfo changes every change_interval: PAPP grows by 10 VA
+at each change, so a client can tell which change it is showing.
+
+    python tools/remora_simulator.py --port 8080 --latency 0.05 --failure-rate 0.1
+"""
+import argparse
+import asyncio
+import random
+from time import monotonic
+
+from aiohttp import web
+
+NB_FILPILOTE = 7
+
+
+class RemoraSimulator:
+    """Simulated Remora device."""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, change_interval=1.0):
+        """Initialize the simulator."""
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.change_interval = change_interval
+        # When down, the requests are not answered at all
+        self.down = False
+        self.fp = {"fp" + str(num): "C" for num in range(1, NB_FILPILOTE + 1)}
+        self.relais = {"relais": 0, "fnct_relais": 2}
+        self.teleinfo = {
+            "ADCO": "012345678901",
+            "OPTARIF": "HC..",
+            "ISOUSC": 45,
+            "HCHC": 1000000,
+            "HCHP": 2000000,
+            "PTEC": "HP..",
+            "IINST": 5,
+            "IMAX": 90,
+            "PAPP": 1000,
+            "HHPHC": "A",
+            "MOTDETAT": "000000",
+        }
+        # path -> number of requests
+        self.requests = {}
+        # PAPP value -> time it was set
+        self.changes = {}
+        self._runner = None
+        self._changer = None
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self._handle_command)
+        app.router.add_get("/hb.htm", self._handle_heartbeat)
+        app.router.add_get("/tinfo", self._handle_teleinfo)
+        app.router.add_get("/fp", self._handle_filpilote)
+        app.router.add_get("/relais", self._handle_relais)
+        app.router.add_get("/reset", self._handle_reset)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0) -> str:
+        """Start serving and return the host:port to configure."""
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self._changer = asyncio.ensure_future(self._change_teleinfo())
+        return host + ":" + str(port)
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        self._changer.cancel()
+        await self._runner.cleanup()
+
+    async def _change_teleinfo(self) -> None:
+        """Change the instantaneous TeleInfo values every change_interval."""
+        while True:
+            await asyncio.sleep(self.change_interval)
+            self.teleinfo["PAPP"] += 10
+            self.teleinfo["IINST"] = self.teleinfo["PAPP"] // 230
+            self.teleinfo["HCHP"] += 1
+            self.changes[self.teleinfo["PAPP"]] = monotonic()
+
+    async def _answer(self, request) -> bool:
+        """Count the request, wait for the simulated latency and return False
+        if it must fail."""
+        path = request.path
+        if request.query:
+            path += "?" + ",".join(request.query)
+        self.requests[path] = self.requests.get(path, 0) + 1
+        if self.down:
+            # Like a rebooting board: no answer until the client times out
+            await asyncio.sleep(3600)
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return random.random() >= self.failure_rate
+
+    async def _handle_heartbeat(self, request):
+        if not await self._answer(request):
+            raise web.HTTPInternalServerError()
+        return web.Response(text="OK")
+
+    async def _handle_teleinfo(self, request):
+        if not await self._answer(request):
+            raise web.HTTPInternalServerError()
+        return web.json_response(self.teleinfo)
+
+    async def _handle_filpilote(self, request):
+        if not await self._answer(request):
+            raise web.HTTPInternalServerError()
+        return web.json_response(self.fp)
+
+    async def _handle_relais(self, request):
+        if not await self._answer(request):
+            raise web.HTTPInternalServerError()
+        return web.json_response(self.relais)
+
+    async def _handle_reset(self, request):
+        await self._answer(request)
+        return web.Response(text="OK")
+
+    async def _handle_command(self, request):
+        """Handle the fp, setfp, relais and frelais commands."""
+        if not await self._answer(request):
+            raise web.HTTPInternalServerError()
+        query = request.query
+        response = 0
+        if "fp" in query and len(query["fp"]) == NB_FILPILOTE:
+            for num, mode in enumerate(query["fp"], 1):
+                if mode != "-":
+                    self.fp["fp" + str(num)] = mode
+        elif "setfp" in query and len(query["setfp"]) == 2:
+            self.fp["fp" + query["setfp"][0]] = query["setfp"][1]
+        elif "relais" in query:
+            self.relais["relais"] = int(query["relais"])
+        elif "frelais" in query:
+            self.relais["fnct_relais"] = int(query["frelais"])
+        else:
+            response = -1
+        return web.json_response({"response": response})
+
+
+async def main(args) -> None:
+    simulator = RemoraSimulator(
+        args.latency, args.jitter, args.failure_rate, args.change_interval
+    )
+    address = await simulator.start(args.host, args.port)
+    print("Remora simulator listening on " + address)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="in sec")
+    parser.add_argument("--jitter", type=float, default=0.0, help="in sec")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--change-interval", type=float, default=1.0, help="in sec")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass